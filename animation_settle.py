@@ -0,0 +1,99 @@
+import time
+import logging
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+# Fingerprint of the odometer state: every visible digit/comma node with its
+# rounded position (odometer ribbons move by transform while animating), plus
+# how many of the four stat labels are on the page and which document was
+# probed (a tab that is still navigating reports the previous page).
+SETTLE_PROBE_JS = """
+var parts = [];
+var keywords = {'Followers': 1, 'Likes': 1, 'Following': 1, 'Videos': 1};
+var found = {};
+var els = document.getElementsByTagName('*');
+for (var i = 0; i < els.length; i++) {
+    var el = els[i];
+    var hasText = false;
+    for (var c = el.firstChild; c; c = c.nextSibling) {
+        if (c.nodeType === 3) { hasText = true; break; }
+    }
+    if (!hasText || el.getClientRects().length === 0) continue;
+    var text = (el.innerText || '').trim();
+    if (keywords[text]) { found[text] = 1; continue; }
+    if (!/^[\\d,]{1,2}$/.test(text)) continue;
+    var r = el.getBoundingClientRect();
+    parts.push(text + '@' + Math.round(r.left) + ',' + Math.round(r.top));
+}
+return [parts.join('|'), Object.keys(found).length, location.href, document.readyState];
+"""
+
+
+class SettleTracker:
+    """Incremental settle detection fed with one probe result at a time
+
+    Used directly when several tabs are polled in turn; wait_for_stats_settle
+    wraps it for the single-page case. With expected_user, a page whose
+    user query value is anything else is treated as not loaded yet.
+    """
+
+    def __init__(self, quiet_window=2.0, timeout=12, expected_user=None):
+        self.quiet_window = quiet_window
+        self.timeout = timeout
+        self.expected_user = expected_user
+        self.start = time.monotonic()
+        self.last_signature = None
+        self.stable_since = self.start
+
+    def elapsed(self):
+        return time.monotonic() - self.start
+
+    def showing_expected(self, href):
+        # Exact match on the user value: a substring would take abc's page for abcd's
+        return parse_qs(urlparse(href).query).get('user') == [self.expected_user]
+
+    def update(self, probe):
+        """Feed a SETTLE_PROBE_JS result; returns (settle_seconds, settled) once done, else None"""
+        now = time.monotonic()
+        signature, keyword_count, href, ready_state = probe
+
+        if self.expected_user is not None and (not self.showing_expected(href) or ready_state == 'loading'):
+            # Still showing the previous document
+            signature = None
+
+        if signature != self.last_signature:
+            self.last_signature = signature
+            self.stable_since = now
+        elif signature and keyword_count >= 4 and now - self.stable_since >= self.quiet_window:
+            return now - self.start, True
+
+        if now - self.start >= self.timeout:
+            return now - self.start, False
+
+        return None
+
+
+def wait_for_stats_settle(driver, quiet_window=2.0, timeout=12, poll_interval=0.25):
+    """Wait until the stat counters stop changing
+
+    Returns (settle_seconds, settled). settled is False when the hard
+    timeout was hit before the counters were quiet for quiet_window seconds.
+    """
+    tracker = SettleTracker(quiet_window=quiet_window, timeout=timeout)
+
+    while True:
+        try:
+            probe = driver.execute_script(SETTLE_PROBE_JS)
+        except Exception as e:
+            logger.warning(f"Settle probe failed, falling back to fixed wait: {e}")
+            remaining = timeout - tracker.elapsed()
+            if remaining > 0:
+                time.sleep(remaining)
+            return tracker.elapsed(), False
+
+        outcome = tracker.update(probe)
+        if outcome is not None:
+            return outcome
+
+        time.sleep(poll_interval)
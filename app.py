@@ -1,17 +1,34 @@
 # Rename dari tiktok_api_local.py untuk deployment
 # File ini siap deploy ke Heroku/Railway/Render GRATIS!
 
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, send_file
 from flask_cors import CORS
 import time
 import json
+import hashlib
 import logging
+import math
 import os
 import sys
+from concurrent.futures import FIRST_COMPLETED, wait
 
 # Import our working scraper
 # Import scraper optimized for Railway
 from tokcount_scraper_railway import TokCountScraperRailway as TokCountFixedDigits
+from driver_pool import ScraperPool
+from memory_governor import MemoryGovernor, MemoryPressure
+from network_blocking import NetworkBlocker
+from fast_path import FastPathScraper
+from debug_artifacts import ArtifactRecorder
+from result_cache import ResultCache, normalize_username
+from scrape_orchestrator import ScrapeOrchestrator, OrchestratorBusy
+from batch_jobs import JobManager
+from work_queue import open_queue
+from history_store import HistoryStore
+from refresh_scheduler import RefreshScheduler
+from upstream_governor import UpstreamGovernor, GovernorTimeout, fast_path_outcome, browser_latency
+import metrics
+import tracing
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -22,81 +39,478 @@ CORS(app)
 
 class TikTokAPIFree:
     def __init__(self):
-        self.scraper = None
-        self.last_used = 0
         self.max_idle_time = 300  # 5 minutes
+        # Browser-free fetch of the counter JSON; Selenium is the fallback
+        self.fast_path = FastPathScraper(timeout=float(os.environ.get('FAST_PATH_TIMEOUT', 5)))
+        # One blocklist shared by every pooled driver so counters add up
+        self.network_blocker = NetworkBlocker()
+        # Debug screenshots (ARTIFACT_MODE=off|failure|sampled), one writer thread
+        self.artifacts = ArtifactRecorder()
+        # Chrome memory from /proc: recycles bloated drivers, sheds work near the ceiling
+        self.memory = MemoryGovernor()
+        # One Chrome session per pool slot, so N slots serve N scrapes in parallel
+        self.pool = ScraperPool(
+            self.create_scraper,
+            size=int(os.environ.get('SCRAPER_POOL_SIZE', 2)),
+            max_pages=int(os.environ.get('SCRAPER_MAX_PAGES', 50)),
+            wait_timeout=float(os.environ.get('SCRAPER_QUEUE_TIMEOUT', 60)),
+            memory=self.memory
+        )
+        # Every request to tokcount.com (http or browser) is paced by this
+        self.governor = UpstreamGovernor(
+            max_concurrency=int(os.environ.get('GOVERNOR_MAX_CONCURRENCY', self.pool.size)),
+            wait_timeout=float(os.environ.get('SCRAPER_QUEUE_TIMEOUT', 60))
+        )
+        self.cache = ResultCache(
+            ttl=float(os.environ.get('CACHE_TTL', 300)),
+            max_size=int(os.environ.get('CACHE_MAX_SIZE', 1000)),
+            stale_grace=float(os.environ.get('CACHE_STALE_GRACE', 600))
+        )
+        # Work-queue mode (WORK_QUEUE_URL): scrapes run on scrape_worker.py
+        # processes, this node only enqueues and waits
+        self.work_queue = open_queue()
+        self.queue_wait_timeout = float(os.environ.get('WORK_QUEUE_WAIT_TIMEOUT', 120))
+        # Every scrape goes through here: one concurrency limit (a slot per pooled
+        # driver, or per pending queue task), and concurrent requests for the same
+        # username share one scrape
+        self.orchestrator = ScrapeOrchestrator(
+            max_concurrency=(
+                int(os.environ.get('WORK_QUEUE_MAX_PENDING', 64)) if self.work_queue else self.pool.size
+            ),
+            max_queue=int(os.environ.get('SCRAPER_MAX_QUEUE', 1000))
+        )
+        # Every successful scrape is also kept as a time series (HISTORY_DIR)
+        self.history = HistoryStore()
+        # Tabs per Chrome session for batch jobs (1 = one page at a time)
+        self.tabs_per_driver = int(os.environ.get('SCRAPER_TABS', 1))
+        # Tracked accounts are refreshed ahead of readers and pinned in the cache
+        self.watchlist = RefreshScheduler(self.refresh_user)
+        for key in self.watchlist.keys():
+            self.cache.pin(key)
     
-    def get_scraper(self):
-        """Get or create scraper instance"""
-        current_time = time.time()
-        
-        # Create new scraper if needed
-        if self.scraper is None:
-            logger.info("🔧 Creating new scraper instance...")
-            # Always headless for cloud deployment
-            self.scraper = TokCountFixedDigits(headless=True)
-            
-        self.last_used = current_time
-        return self.scraper
+    def create_scraper(self):
+        """Create a new scraper instance for the pool"""
+        logger.info("🔧 Creating new scraper instance...")
+        # Always headless for cloud deployment
+        return TokCountFixedDigits(
+            headless=True,
+            settle_quiet_window=float(os.environ.get('SETTLE_QUIET_WINDOW', 2.0)),
+            settle_timeout=float(os.environ.get('SETTLE_TIMEOUT', 12)),
+            network_blocker=self.network_blocker,
+            artifact_recorder=self.artifacts
+        )
     
     def cleanup_scraper(self):
-        """Cleanup scraper if idle too long"""
-        if self.scraper and (time.time() - self.last_used) > self.max_idle_time:
-            logger.info("🧹 Cleaning up idle scraper...")
-            try:
-                self.scraper.close_driver()
-            except:
-                pass
-            self.scraper = None
+        """Cleanup scrapers idle too long"""
+        self.pool.cleanup_idle(self.max_idle_time)
+    
+    def fast_path_fetch(self, username):
+        """HTTP fast path under the governor; None when it is off or missed"""
+        if not self.fast_path.enabled:
+            return None
+        with tracing.span('fast_path', username=username):
+            result = self.governor.call(
+                'http', self.fast_path.scrape_user_data, username, outcome=fast_path_outcome
+            )
+        return dict(result, source='http') if result else None
+    
+    def fetch_user_data(self, username):
+        """Try the HTTP fast path, fall back to a browser scrape on a pooled driver"""
+        result = self.fast_path_fetch(username)
+        if result:
+            return result
+        
+        if self.work_queue:
+            return self.fetch_via_queue([username])[username]
+        
+        # Includes the waits for an upstream slot and then a pooled driver; a
+        # GovernorTimeout raised before checkout leaves the driver idle and healthy
+        with tracing.span('browser_scrape', username=username), self.governor.reserve() as call:
+            with self.pool.scraper() as scraper:
+                result = call('browser', scraper.scrape_user_data, username, latency=browser_latency)
+        return dict(result, source='browser') if result else result
+    
+    def format_result(self, username, result):
+        """Turn a raw scraper result (or None) into the API response dict"""
+        if result:
+            return {
+                'username': result.get('username', username),
+                'followers': result.get('followers', '0'),
+                'likes': result.get('likes', '0'),
+                'following': result.get('following', '0'),
+                'videos': result.get('videos', '0'),
+                'settle_seconds': result.get('settle_seconds'),
+                'network': result.get('network'),
+                'source': result.get('source'),
+                'success': True,
+                'message': 'Data scraped successfully',
+                'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'platform': 'Free Cloud Deployment'
+            }
+        return self.error_result(username, 'Failed to scrape data')
+    
+    def error_result(self, username, message):
+        return {
+            'username': username,
+            'followers': '0',
+            'likes': '0',
+            'following': '0',
+            'videos': '0',
+            'success': False,
+            'message': message,
+            'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'platform': 'Free Cloud Deployment'
+        }
     
     def scrape_user(self, username):
         """Scrape user data"""
         try:
-            scraper = self.get_scraper()
-            result = scraper.scrape_user_data(username)
-            
+            result, shared = self.orchestrator.run_sync(
+                normalize_username(username), self.fetch_user_data, username
+            )
+            return self.finish_scrape(username, result, shared)
+                
+        except (OrchestratorBusy, GovernorTimeout):
+            raise
+        except Exception as e:
+            logger.error(f"Error scraping {username}: {e}")
+            return self.error_result(username, f'Scraping error: {str(e)}')
+    
+    async def scrape_user_async(self, username):
+        """scrape_user for async views: waits on the orchestrator without blocking a worker"""
+        try:
+            result, shared = await self.orchestrator.run(
+                normalize_username(username), self.fetch_user_data, username
+            )
+            return self.finish_scrape(username, result, shared)
+                
+        except (OrchestratorBusy, GovernorTimeout):
+            raise
+        except Exception as e:
+            logger.error(f"Error scraping {username}: {e}")
+            return self.error_result(username, f'Scraping error: {str(e)}')
+    
+    def finish_scrape(self, username, result, shared):
+        if shared:
+            logger.info(f"🔗 Joined in-flight scrape for {username}")
+        return self.format_result(username, result)
+    
+    def scrape_users(self, usernames):
+        """Scrape several users: fast path first, then one pooled driver using multiple tabs"""
+        raw = {}
+        for username in usernames:
+            result = self.fast_path_fetch(username)
             if result:
+                raw[username] = result
+        
+        remaining = [username for username in usernames if username not in raw]
+        if remaining:
+            try:
+                scraped, _ = self.orchestrator.run_sync(None, self.scrape_many_browser, remaining)
+                raw.update(scraped)
+            except (OrchestratorBusy, GovernorTimeout):
+                raise
+            except Exception as e:
+                logger.error(f"Error scraping {remaining}: {e}")
+                for username in remaining:
+                    raw[username] = None
                 return {
-                    'username': result.get('username', username),
-                    'followers': result.get('followers', '0'),
-                    'likes': result.get('likes', '0'),
-                    'following': result.get('following', '0'),
-                    'videos': result.get('videos', '0'),
-                    'success': True,
-                    'message': 'Data scraped successfully',
-                    'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
-                    'platform': 'Free Cloud Deployment'
+                    username: (self.format_result(username, raw[username]) if raw[username]
+                               else self.error_result(username, f'Scraping error: {str(e)}'))
+                    for username in usernames
                 }
+        
+        return {username: self.format_result(username, raw.get(username)) for username in usernames}
+    
+    def fetch_via_queue(self, usernames):
+        """Enqueue one task per username and wait for the workers' raw results"""
+        trace = tracing.current_trace()
+        payload = {'trace_id': trace.id, 'profile': trace.profile} if trace else {}
+        task_ids = {
+            username: self.work_queue.enqueue(
+                'scrape_user', dict(payload, username=username), dedupe_key=normalize_username(username)
+            )
+            for username in usernames
+        }
+        deadline = time.monotonic() + self.queue_wait_timeout
+        results = {}
+        for username, task_id in task_ids.items():
+            info = self.work_queue.wait(task_id, max(0, deadline - time.monotonic()))
+            if info is None:
+                raise TimeoutError(f'no worker finished {username} within {self.queue_wait_timeout:.0f}s')
+            if info['status'] == 'failed':
+                raise RuntimeError(info['error'] or 'worker failed')
+            results[username] = info['result']
+        return results
+    
+    def scrape_many_browser(self, usernames):
+        """Multi-tab browser scrape on one pooled driver (runs on the orchestrator)"""
+        if self.work_queue:
+            return self.fetch_via_queue(usernames)
+        with self.governor.reserve(len(usernames)) as call, self.pool.scraper() as scraper:
+            results = call('browser', scraper.scrape_many, usernames, self.tabs_per_driver, many=True)
+        return {
+            username: dict(result, source='browser') if result else result
+            for username, result in results.items()
+        }
+
+    def is_cacheable(self, result):
+        """Only keep successful results that found at least one stat"""
+        return result.get('success') and any(
+            result.get(key) != 'Not found'
+            for key in ('followers', 'likes', 'following', 'videos')
+        )
+    
+    def cached_user(self, username, max_age=None):
+        """Cached response for username, or None when it has to be scraped"""
+        key = normalize_username(username)
+        self.watchlist.record_read(key)
+        value, age, state = self.cache.lookup(key, max_age)
+        
+        if state == 'fresh':
+            return dict(value, cached=True, age_seconds=round(age, 3))
+        
+        if state == 'stale':
+            logger.info(f"♻️ Serving stale {key} ({age:.0f}s old), refreshing in background")
+            # Through store_user, so background refreshes are recorded in history too
+            self.cache.refresh_in_background(
+                key, lambda: self.scrape_user(username), self.is_cacheable,
+                store=lambda result: self.store_user(username, result)
+            )
+            return dict(value, cached=True, stale=True, age_seconds=round(age, 3))
+        
+        return None
+    
+    def store_user(self, username, result):
+        if self.is_cacheable(result):
+            key = normalize_username(username)
+            self.cache.set(key, result, ttl=self.watchlist.ttl_for(key))
+            try:
+                self.history.append(key, result)
+            except Exception as e:
+                logger.warning(f"Could not record history for {username}: {e}")
+        return dict(result, cached=False, age_seconds=0)
+    
+    def refresh_user(self, username):
+        """Watchlist refresh: scrape and store exactly like a read miss; True on success"""
+        result = self.scrape_user(username)
+        self.store_user(username, result)
+        return bool(self.is_cacheable(result))
+    
+    def watch(self, username, interval=None):
+        entry = self.watchlist.add(username, interval)
+        self.cache.pin(normalize_username(username))
+        return entry
+    
+    def unwatch(self, username):
+        self.cache.unpin(normalize_username(username))
+        return self.watchlist.remove(username)
+    
+    def get_user(self, username, max_age=None):
+        """Serve user stats from cache when possible, scraping otherwise"""
+        cached = self.cached_user(username, max_age)
+        if cached is not None:
+            return cached
+        return self.store_user(username, self.scrape_user(username))
+    
+    async def get_user_async(self, username, max_age=None):
+        """get_user for async views"""
+        cached = self.cached_user(username, max_age)
+        if cached is not None:
+            return cached
+        return self.store_user(username, await self.scrape_user_async(username))
+
+    def get_users(self, usernames):
+        """Batch get_user: fresh cache hits first, one multi-tab scrape for the rest"""
+        results = {}
+        missing = []
+        for username in usernames:
+            value, age, state = self.cache.lookup(normalize_username(username))
+            if state == 'fresh':
+                results[username] = dict(value, cached=True, age_seconds=round(age, 3))
             else:
-                return {
-                    'username': username,
-                    'followers': '0',
-                    'likes': '0',
-                    'following': '0',
-                    'videos': '0',
-                    'success': False,
-                    'message': 'Failed to scrape data',
-                    'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
-                    'platform': 'Free Cloud Deployment'
-                }
-                
-        except Exception as e:
-            logger.error(f"Error scraping {username}: {e}")
-            return {
-                'username': username,
-                'followers': '0',
-                'likes': '0',
-                'following': '0',
-                'videos': '0',
-                'success': False,
-                'message': f'Scraping error: {str(e)}',
-                'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
-                'platform': 'Free Cloud Deployment'
-            }
+                missing.append(username)
+        
+        if missing:
+            for username, result in self.scrape_users(missing).items():
+                results[username] = self.store_user(username, result)
+        
+        return results
+    
+    def iter_users(self, usernames, max_age=None, heartbeat=None):
+        """get_user for several usernames, yielding (username, result) as each one finishes
+
+        Cache hits come first, then scrapes in completion order. Yields None
+        when heartbeat seconds pass without a result, so callers can keep
+        the connection alive.
+        """
+        pending = {}
+        for username in usernames:
+            cached = self.cached_user(username, max_age)
+            if cached is not None:
+                yield username, cached
+            else:
+                future = self.orchestrator.submit(normalize_username(username), self.fetch_user_data, username)
+                pending[future] = username
+        
+        while pending:
+            done, _ = wait(pending, timeout=heartbeat, return_when=FIRST_COMPLETED)
+            if not done:
+                yield None
+                continue
+            for future in done:
+                username = pending.pop(future)
+                try:
+                    result = self.finish_scrape(username, *future.result())
+                except MemoryPressure:
+                    result = self.error_result(username, 'Server is low on memory, try again shortly')
+                except OrchestratorBusy:
+                    result = self.error_result(username, 'Too many scrapes queued, try again shortly')
+                except GovernorTimeout:
+                    result = self.error_result(username, 'Upstream is throttled, try again shortly')
+                except Exception as e:
+                    logger.error(f"Error scraping {username}: {e}")
+                    result = self.error_result(username, f'Scraping error: {str(e)}')
+                yield username, self.store_user(username, result)
+
+def parse_timestamp(value, default):
+    """Parse an optional unix timestamp query parameter; raises ValueError if invalid"""
+    if value is None or value == '':
+        return default
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError('timestamp must be finite')
+    return int(number)
+
+def parse_flag(value):
+    """Truthy query/body flag: true, 1, yes, on"""
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+def unique_usernames(usernames):
+    """Stripped usernames in order, without blanks, non-strings or duplicates"""
+    unique = []
+    seen = set()
+    for username in usernames:
+        if isinstance(username, str) and username.strip():
+            key = normalize_username(username)
+            if key and key not in seen:
+                seen.add(key)
+                unique.append(username.strip())
+    return unique
+
+def traced_response(result, trace):
+    """Attach the trace id (and profile links when the request asked for them)"""
+    response = dict(result, trace_id=trace.id)
+    if trace.profile:
+        response['profiles_url'] = f'/api/profiles/{trace.id}'
+    return response
+
+def stats_etag(result):
+    """Strong ETag over the username and the four stat values"""
+    values = '|'.join(
+        str(result.get(key)) for key in ('username', 'followers', 'likes', 'following', 'videos')
+    )
+    return hashlib.sha1(values.encode()).hexdigest()[:20]
+
+def conditional_response(response, result):
+    """Add ETag/Last-Modified to a successful result; 304 when the client's copy is current
+
+    Last-Modified is the scrape time, so a cache hit revalidates without scraping.
+    """
+    if not result.get('success'):
+        return response
+    response.set_etag(stats_etag(result))
+    try:
+        response.last_modified = time.mktime(time.strptime(result['scraped_at'], '%Y-%m-%d %H:%M:%S'))
+    except (KeyError, ValueError):
+        pass
+    # Clients may keep the body but must revalidate before reusing it
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def upstream_throttled(error):
+    """503 with Retry-After for a scrape that waited too long for an upstream slot"""
+    logger.warning(f"Upstream throttled: {error}")
+    response = jsonify({
+        'success': False,
+        'message': 'Upstream is throttled, try again shortly'
+    })
+    response.headers['Retry-After'] = str(int(api.governor.cooldown))
+    return response, 503
+
+def parse_max_age(value):
+    """Parse the optional max_age parameter (seconds); raises ValueError if invalid"""
+    if value is None or value == '':
+        return None
+    max_age = float(value)
+    if not math.isfinite(max_age) or max_age < 0:
+        raise ValueError('max_age must be a finite number >= 0')
+    return max_age
 
 # Global API instance
 api = TikTokAPIFree()
 
+# Background batch jobs, one worker per pooled driver
+jobs = JobManager(
+    api.get_user,
+    fetch_many=api.get_users if api.tabs_per_driver > 1 else None,
+    chunk_size=api.tabs_per_driver,
+    workers=api.pool.size,
+    retention=float(os.environ.get('JOB_RETENTION', 3600)),
+    max_usernames=int(os.environ.get('JOB_MAX_USERNAMES', 500))
+)
+
+def queue_depths():
+    """Work waiting at each stage, for the tokcount_queue_depth gauge"""
+    depths = {
+        ('orchestrator',): api.orchestrator.waiting,
+        ('driver_pool',): api.pool.waiting,
+        ('governor',): api.governor.waiting,
+        ('batch_jobs',): jobs.stats()['active']
+    }
+    if api.work_queue:
+        depths[('work_queue',)] = api.work_queue.stats()['queued']
+    return depths
+
+# Live values read when /metrics is scraped; phase timings and scrape
+# outcomes are recorded where they happen (see metrics.py)
+metrics.registry.counter_callback(
+    'tokcount_driver_recycles_total', 'Pooled Chrome drivers replaced after max_pages or a failed health check',
+    lambda: api.pool.recycled
+)
+metrics.registry.gauge_callback(
+    'tokcount_drivers', 'Chrome drivers by state',
+    lambda: {('launched',): api.pool.launched, ('in_use',): api.pool.in_use}, ['state']
+)
+metrics.registry.gauge_callback(
+    'tokcount_queue_depth', 'Requests or tasks waiting per stage', queue_depths, ['queue']
+)
+metrics.registry.counter_callback(
+    'tokcount_cache_lookups_total', 'Result cache lookups by result',
+    lambda: {(state,): api.cache.stats()[key] for state, key in
+             (('fresh', 'hits'), ('stale', 'stale_hits'), ('miss', 'misses'))},
+    ['result']
+)
+metrics.registry.gauge_callback(
+    'tokcount_memory_bytes', 'RSS of this process and its Chrome drivers, and the ceiling it is held under',
+    lambda: {('total',): api.memory.total_rss(), ('ceiling',): api.memory.ceiling or 0} if api.memory.enabled else None,
+    ['scope']
+)
+metrics.registry.counter_callback(
+    'tokcount_memory_actions_total', 'Drivers recycled over the per-driver limit and scrapes shed near the ceiling',
+    lambda: {('recycled',): api.memory.recycled, ('shed',): api.memory.shed}, ['action']
+)
+metrics.registry.gauge_callback(
+    'tokcount_governor_concurrency_limit', 'Current AIMD concurrency limit toward tokcount.com',
+    lambda: api.governor.limit
+)
+metrics.registry.gauge_callback(
+    'tokcount_governor_rate', 'Current request rate limit toward tokcount.com (per second)',
+    lambda: api.governor.rate
+)
+
 @app.route('/', methods=['GET'])
 def home():
     """API documentation"""
@@ -115,9 +529,18 @@ def home():
         'endpoints': {
             'GET /': 'API documentation',
             'GET /health': 'Health check',
-            'GET /api/user/<username>': 'Get TikTok user stats',
-            'POST /api/user': 'Get TikTok user stats (JSON body)',
-            'POST /api/batch': 'Get multiple users stats (max 3)'
+            'GET /metrics': 'Prometheus metrics (scrape phase timings, outcomes, queue depth)',
+            'GET /api/user/<username>': 'Get TikTok user stats (optional ?max_age=<seconds>, ?profile=1 to profile extraction; ETag/Last-Modified, 304 on If-None-Match/If-Modified-Since)',
+            'GET /api/profiles/<trace_id>': 'Profiles stored for a request made with profile=1',
+            'GET /api/user/<username>/history': 'Stored stats over time (?from=&to=<unix time>, optional ?step=<seconds>)',
+            'POST /api/user': 'Get TikTok user stats (JSON body, optional max_age)',
+            'POST /api/batch': 'Get multiple users stats (max 3)',
+            'POST /api/batch/stream': 'Stream each user\'s stats as it finishes (NDJSON, or SSE with ?format=sse)',
+            'POST /api/jobs': 'Start a background batch job (JSON body with usernames)',
+            'GET /api/jobs/<job_id>': 'Get batch job progress and results',
+            'GET /api/watchlist': 'Tracked accounts kept fresh in the background',
+            'POST /api/watchlist': 'Track an account (JSON body with username, optional interval seconds)',
+            'DELETE /api/watchlist/<username>': 'Stop tracking an account'
         },
         'example': {
             'url': '/api/user/rafiedotid',
@@ -129,7 +552,9 @@ def home():
                 'videos': '18',
                 'success': True,
                 'message': 'Data scraped successfully',
-                'platform': 'Free Cloud Deployment'
+                'platform': 'Free Cloud Deployment',
+                'cached': False,
+                'age_seconds': 0
             }
         },
         'deployment_platforms': [
@@ -149,13 +574,30 @@ def health_check():
         'message': '🆓 Free TikTok API is running!',
         'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
         'version': '1.0 (Free Cloud)',
-        'scraper_active': api.scraper is not None,
+        'scraper_active': api.pool.launched > 0,
+        'scraper_pool': api.pool.stats(),
+        'memory': api.memory.stats(),
+        'cache': api.cache.stats(),
+        'orchestrator': api.orchestrator.stats(),
+        'governor': api.governor.stats(),
+        'history': api.history.stats(),
+        'watchlist': api.watchlist.stats(),
+        'work_queue': api.work_queue.stats() if api.work_queue else None,
+        'jobs': jobs.stats(),
+        'network': api.network_blocker.stats(),
+        'fast_path': api.fast_path.stats(),
+        'artifacts': api.artifacts.stats(),
         'platform': os.environ.get('PLATFORM', 'Unknown'),
         'cost': '$0'
     })
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus text-format metrics"""
+    return app.response_class(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
 @app.route('/api/user/<username>', methods=['GET'])
-def get_user_stats(username):
+async def get_user_stats(username):
     """Get TikTok user statistics"""
     try:
         if not username or len(username.strip()) == 0:
@@ -173,15 +615,47 @@ def get_user_stats(username):
                 'message': 'Username too long'
             }), 400
         
+        try:
+            max_age = parse_max_age(request.args.get('max_age'))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'max_age must be a non-negative number of seconds'
+            }), 400
+        
+        # Profiling needs a real scrape, so it bypasses the cache
+        profile = parse_flag(request.args.get('profile'))
+        if profile:
+            max_age = 0
+        
         logger.info(f"🎯 FREE API request for user: {username}")
         
         # Cleanup idle scraper
         api.cleanup_scraper()
         
-        # Scrape data
-        result = api.scrape_user(username)
+        # Serve from cache or wait for the orchestrator
+        with tracing.trace('GET /api/user', username=username, profile=profile) as trace:
+            result = await api.get_user_async(username, max_age=max_age)
+        
+        # If-None-Match / If-Modified-Since against the result just served get a 304
+        return conditional_response(jsonify(traced_response(result, trace)), result)
+        
+    except MemoryPressure as e:
+        logger.warning(f"Shedding scrape under memory pressure: {e}")
+        return jsonify({
+            'success': False,
+            'message': 'Server is low on memory, try again shortly'
+        }), 503
+        
+    except GovernorTimeout as e:
+        return upstream_throttled(e)
         
-        return jsonify(result)
+    except OrchestratorBusy as e:
+        logger.warning(f"Scrape queue full: {e}")
+        return jsonify({
+            'success': False,
+            'message': 'Too many scrapes queued, try again shortly'
+        }), 503
         
     except Exception as e:
         logger.error(f"API error for {username}: {e}")
@@ -191,8 +665,61 @@ def get_user_stats(username):
             'message': f'Internal server error: {str(e)}'
         }), 500
 
+@app.route('/api/user/<username>/history', methods=['GET'])
+def get_user_history(username):
+    """Get stored stats of a user over time, downsampled to min/max/last per bucket"""
+    try:
+        now = int(time.time())
+        try:
+            end = parse_timestamp(request.args.get('to'), now)
+            start = parse_timestamp(request.args.get('from'), end - 30 * 24 * 3600)
+            step = parse_timestamp(request.args.get('step'), None)
+            max_points = parse_timestamp(request.args.get('max_points'), 500)
+        except (ValueError, OverflowError):
+            return jsonify({
+                'success': False,
+                'message': 'from, to, step and max_points must be numbers'
+            }), 400
+        
+        if start > end or (step is not None and step <= 0) or max_points <= 0:
+            return jsonify({
+                'success': False,
+                'message': 'Need from <= to, step > 0 and max_points > 0'
+            }), 400
+        
+        columns = api.history.query(normalize_username(username), start, end)
+        samples = len(columns['t'])
+        
+        if step is None and samples > max_points:
+            step = -(-(end - start + 1) // max_points)
+        
+        if step is None:
+            points = [
+                {name: values[i] for name, values in columns.items()}
+                for i in range(samples)
+            ]
+        else:
+            points = api.history.downsample(columns, step, origin=start)
+        
+        return jsonify({
+            'success': True,
+            'username': username,
+            'from': start,
+            'to': end,
+            'step': step,
+            'samples': samples,
+            'points': points
+        })
+        
+    except Exception as e:
+        logger.error(f"History API error for {username}: {e}")
+        return jsonify({
+            'success': False,
+            'message': f'Internal server error: {str(e)}'
+        }), 500
+
 @app.route('/api/user', methods=['POST'])
-def get_user_stats_post():
+async def get_user_stats_post():
     """Get TikTok user statistics via POST"""
     try:
         data = request.get_json()
@@ -211,15 +738,46 @@ def get_user_stats_post():
                 'message': 'Username cannot be empty'
             }), 400
         
+        try:
+            max_age = parse_max_age(data.get('max_age'))
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'message': 'max_age must be a non-negative number of seconds'
+            }), 400
+        
+        # Profiling needs a real scrape, so it bypasses the cache
+        profile = parse_flag(data.get('profile', False))
+        if profile:
+            max_age = 0
+        
         logger.info(f"🎯 FREE POST API request for user: {username}")
         
         # Cleanup idle scraper
         api.cleanup_scraper()
         
-        # Scrape data
-        result = api.scrape_user(username)
+        # Serve from cache or wait for the orchestrator
+        with tracing.trace('POST /api/user', username=username, profile=profile) as trace:
+            result = await api.get_user_async(username, max_age=max_age)
+        
+        return jsonify(traced_response(result, trace))
+        
+    except MemoryPressure as e:
+        logger.warning(f"Shedding scrape under memory pressure: {e}")
+        return jsonify({
+            'success': False,
+            'message': 'Server is low on memory, try again shortly'
+        }), 503
         
-        return jsonify(result)
+    except GovernorTimeout as e:
+        return upstream_throttled(e)
+        
+    except OrchestratorBusy as e:
+        logger.warning(f"Scrape queue full: {e}")
+        return jsonify({
+            'success': False,
+            'message': 'Too many scrapes queued, try again shortly'
+        }), 503
         
     except Exception as e:
         logger.error(f"POST API error: {e}")
@@ -260,15 +818,13 @@ def get_batch_stats():
         # Cleanup idle scraper
         api.cleanup_scraper()
         
+        # Pacing toward tokcount.com is up to the upstream governor
         results = []
         for username in usernames:
             if isinstance(username, str) and username.strip():
                 username = username.strip()
                 result = api.scrape_user(username)
                 results.append(result)
-                
-                # Small delay between requests
-                time.sleep(3)
         
         return jsonify({
             'success': True,
@@ -277,6 +833,23 @@ def get_batch_stats():
             'platform': 'Free Cloud Deployment'
         })
         
+    except MemoryPressure as e:
+        logger.warning(f"Shedding scrape under memory pressure: {e}")
+        return jsonify({
+            'success': False,
+            'message': 'Server is low on memory, try again shortly'
+        }), 503
+        
+    except GovernorTimeout as e:
+        return upstream_throttled(e)
+        
+    except OrchestratorBusy as e:
+        logger.warning(f"Scrape queue full: {e}")
+        return jsonify({
+            'success': False,
+            'message': 'Too many scrapes queued, try again shortly'
+        }), 503
+        
     except Exception as e:
         logger.error(f"Batch API error: {e}")
         return jsonify({
@@ -284,6 +857,249 @@ def get_batch_stats():
             'message': f'Internal server error: {str(e)}'
         }), 500
 
+def stream_records(records, sse):
+    """Encode stream records as NDJSON lines or server-sent events"""
+    for record in records:
+        if record is None:
+            # Keeps proxies from closing an idle connection while scrapes run
+            yield ': keepalive\n\n' if sse else json.dumps({'type': 'heartbeat'}) + '\n'
+        elif sse:
+            yield f"event: {record['type']}\ndata: {json.dumps(record)}\n\n"
+        else:
+            yield json.dumps(record) + '\n'
+
+@app.route('/api/batch/stream', methods=['POST'])
+def stream_batch_stats():
+    """Get multiple users' statistics, streaming each result as soon as it is ready"""
+    data = request.get_json(silent=True)
+    
+    if not data or 'usernames' not in data:
+        return jsonify({
+            'success': False,
+            'message': 'usernames array is required in JSON body'
+        }), 400
+    
+    usernames = data['usernames']
+    max_usernames = int(os.environ.get('BATCH_STREAM_MAX_USERNAMES', 50))
+    
+    if not isinstance(usernames, list) or len(usernames) == 0:
+        return jsonify({
+            'success': False,
+            'message': 'usernames must be a non-empty array'
+        }), 400
+    
+    if len(usernames) > max_usernames:
+        return jsonify({
+            'success': False,
+            'message': f'Maximum {max_usernames} usernames per streamed batch'
+        }), 400
+    
+    try:
+        max_age = parse_max_age(data.get('max_age'))
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'message': 'max_age must be a non-negative number of seconds'
+        }), 400
+    
+    # Keep order, drop blanks and duplicates
+    usernames = unique_usernames(usernames)
+    if not usernames:
+        return jsonify({
+            'success': False,
+            'message': 'usernames must contain at least one valid username'
+        }), 400
+    
+    sse = request.args.get('format') == 'sse' or 'text/event-stream' in request.headers.get('Accept', '')
+    heartbeat = float(os.environ.get('BATCH_STREAM_HEARTBEAT', 15))
+    logger.info(f"🎯 Streamed batch request for {len(usernames)} user(s)")
+    
+    # Cleanup idle scraper
+    api.cleanup_scraper()
+    
+    def records():
+        start = time.monotonic()
+        succeeded = 0
+        for item in api.iter_users(usernames, max_age=max_age, heartbeat=heartbeat):
+            if item is None:
+                yield None
+                continue
+            username, result = item
+            succeeded += bool(result.get('success'))
+            yield {'type': 'result', 'username': username, 'data': result}
+        yield {
+            'type': 'summary',
+            'success': True,
+            'count': len(usernames),
+            'succeeded': succeeded,
+            'failed': len(usernames) - succeeded,
+            'elapsed_seconds': round(time.monotonic() - start, 2),
+            'platform': 'Free Cloud Deployment'
+        }
+    
+    return app.response_class(
+        stream_records(records(), sse),
+        mimetype='text/event-stream' if sse else 'application/x-ndjson',
+        # X-Accel-Buffering stops nginx-style proxies from holding the stream back
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """Start a background batch job"""
+    try:
+        data = request.get_json(silent=True)
+        
+        if not data or 'usernames' not in data:
+            return jsonify({
+                'success': False,
+                'message': 'usernames array is required in JSON body'
+            }), 400
+        
+        usernames = data['usernames']
+        
+        if not isinstance(usernames, list) or len(usernames) == 0:
+            return jsonify({
+                'success': False,
+                'message': 'usernames must be a non-empty array'
+            }), 400
+        
+        # Keep order, drop blanks and duplicates
+        unique = unique_usernames(usernames)
+        
+        if not unique:
+            return jsonify({
+                'success': False,
+                'message': 'usernames must contain at least one valid username'
+            }), 400
+        
+        if len(unique) > jobs.max_usernames:
+            return jsonify({
+                'success': False,
+                'message': f'Maximum {jobs.max_usernames} usernames per job'
+            }), 400
+        
+        api.cleanup_scraper()
+        
+        job = jobs.submit(unique)
+        
+        return jsonify(dict(
+            job.to_dict(include_results=False),
+            success=True,
+            status_url=f'/api/jobs/{job.id}'
+        )), 202
+        
+    except Exception as e:
+        logger.error(f"Job API error: {e}")
+        return jsonify({
+            'success': False,
+            'message': f'Internal server error: {str(e)}'
+        }), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get batch job progress and results"""
+    job = jobs.get(job_id)
+    
+    if job is None:
+        return jsonify({
+            'success': False,
+            'message': 'Job not found (unknown id or expired)'
+        }), 404
+    
+    return jsonify(dict(job.to_dict(), success=True))
+
+@app.route('/api/profiles/<trace_id>', methods=['GET'])
+def list_profiles(trace_id):
+    """List the cProfile dumps stored for a profiled request"""
+    paths = tracing.profile_store.find(trace_id)
+    if not paths:
+        return jsonify({
+            'success': False,
+            'message': 'No profiles for this trace (not profiled, answered without a browser scrape, or expired)'
+        }), 404
+    
+    names = [os.path.basename(path)[len(trace_id) + 1:-len('.prof')] for path in paths]
+    return jsonify({
+        'success': True,
+        'trace_id': trace_id,
+        'profiles': [
+            {'name': name, 'url': f'/api/profiles/{trace_id}/{name}', 'text_url': f'/api/profiles/{trace_id}/{name}?format=text'}
+            for name in names
+        ]
+    })
+
+@app.route('/api/profiles/<trace_id>/<name>', methods=['GET'])
+def download_profile(trace_id, name):
+    """Download one profile (.prof for snakeviz/pstats, or ?format=text)"""
+    path = tracing.profile_store.path(trace_id, name)
+    if path not in tracing.profile_store.find(trace_id):
+        return jsonify({
+            'success': False,
+            'message': 'Profile not found'
+        }), 404
+    
+    if request.args.get('format') == 'text':
+        return app.response_class(tracing.profile_store.as_text(path), content_type='text/plain; charset=utf-8')
+    return send_file(os.path.abspath(path), as_attachment=True, download_name=os.path.basename(path))
+
+@app.route('/api/watchlist', methods=['GET'])
+def get_watchlist():
+    """List tracked accounts and their refresh state"""
+    return jsonify({
+        'success': True,
+        'accounts': api.watchlist.entries(),
+        'scheduler': api.watchlist.stats()
+    })
+
+@app.route('/api/watchlist', methods=['POST'])
+def add_to_watchlist():
+    """Track an account so reads of it are always served fresh from cache"""
+    data = request.get_json(silent=True)
+    
+    if not data or not isinstance(data.get('username'), str) or not data['username'].strip():
+        return jsonify({
+            'success': False,
+            'message': 'Username is required in JSON body'
+        }), 400
+    
+    username = data['username'].strip()
+    if len(username) > 50:
+        return jsonify({
+            'success': False,
+            'message': 'Username too long'
+        }), 400
+    
+    interval = data.get('interval')
+    if interval is not None:
+        try:
+            interval = float(interval)
+        except (TypeError, ValueError):
+            interval = -1
+        if interval < api.watchlist.min_interval:
+            return jsonify({
+                'success': False,
+                'message': f'interval must be at least {api.watchlist.min_interval} seconds'
+            }), 400
+    
+    entry = api.watch(username, interval)
+    
+    return jsonify(dict(entry.to_dict(time.time()), success=True)), 201
+
+@app.route('/api/watchlist/<username>', methods=['DELETE'])
+def remove_from_watchlist(username):
+    """Stop tracking an account"""
+    if not api.unwatch(username):
+        return jsonify({
+            'success': False,
+            'message': 'Username is not on the watchlist'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'message': f'{username} removed from the watchlist'
+    })
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({
@@ -309,20 +1125,43 @@ if __name__ == '__main__':
     print("📡 API Endpoints:")
     print("   GET  /                     - API documentation")
     print("   GET  /health               - Health check")
+    print("   GET  /metrics              - Prometheus metrics")
     print("   GET  /api/user/<username>  - Get user stats")
+    print("   GET  /api/user/<username>/history - Stats over time")
     print("   POST /api/user             - Get user stats (JSON)")
     print("   POST /api/batch            - Get multiple users (max 2)")
+    print("   POST /api/jobs             - Start background batch job")
+    print("   GET  /api/jobs/<job_id>    - Get batch job progress")
+    print("   GET  /api/watchlist        - Tracked accounts (POST to add, DELETE /<username> to remove)")
     print("")
     print(f"⚡ Starting server on port {port}")
     print("🔧 Using Selenium scraper for accurate data extraction")
     
+    if api.work_queue:
+        print("📮 Work-queue mode: scrapes run on scrape_worker.py processes")
+    else:
+        print(f"🔥 Pre-launching {api.pool.size} Chrome driver(s)...")
+        api.pool.warm()
+    
+    api.watchlist.start()
+    
     try:
-        app.run(host='0.0.0.0', port=port, debug=False)
+        try:
+            from waitress import serve
+        except ImportError:
+            print("⚠️ waitress not installed, using the Flask development server")
+            app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
+        else:
+            # Idle and queued connections live in waitress' I/O loop; threads only
+            # wait on orchestrator futures, so they can be plentiful and cheap
+            threads = int(os.environ.get('WAITRESS_THREADS', 64))
+            print(f"🍽️ Serving with waitress ({threads} threads)")
+            serve(app, host='0.0.0.0', port=port, threads=threads,
+                  connection_limit=int(os.environ.get('WAITRESS_CONNECTION_LIMIT', 1000)))
     except KeyboardInterrupt:
         print("\n🛑 Shutting down...")
-        if api.scraper:
-            api.scraper.close_driver()
     except Exception as e:
         print(f"❌ Server error: {e}")
-        if api.scraper:
-            api.scraper.close_driver()
\ No newline at end of file
+    finally:
+        api.orchestrator.shutdown()
+        api.pool.close_all()
\ No newline at end of file
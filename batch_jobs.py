@@ -0,0 +1,152 @@
+import threading
+import time
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class BatchJob:
+    """Progress and per-user outcome of one background batch"""
+
+    def __init__(self, usernames):
+        self.id = uuid.uuid4().hex
+        self.usernames = usernames
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.results = {}
+        self.failures = {}
+        self.lock = threading.Lock()
+
+    @property
+    def status(self):
+        if self.finished_at is not None:
+            return 'completed'
+        if self.started_at is not None:
+            return 'running'
+        return 'queued'
+
+    def to_dict(self, include_results=True):
+        with self.lock:
+            done = len(self.results) + len(self.failures)
+            data = {
+                'job_id': self.id,
+                'status': self.status,
+                'total': len(self.usernames),
+                'completed': len(self.results),
+                'failed': len(self.failures),
+                'progress': round(100.0 * done / len(self.usernames), 1),
+                'created_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.created_at)),
+                'finished_at': (
+                    time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.finished_at))
+                    if self.finished_at else None
+                )
+            }
+            if include_results:
+                data['results'] = [self.results[u] for u in self.usernames if u in self.results]
+                data['failures'] = [self.failures[u] for u in self.usernames if u in self.failures]
+            return data
+
+
+class JobManager:
+    """Run batch scrapes in the background across a fixed number of workers
+
+    fetch(username) must return the API result dict; results with
+    success=False are recorded as failures. When fetch_many is given,
+    usernames are handed out chunk_size at a time and fetch_many(chunk)
+    must return {username: result dict}.
+    """
+
+    def __init__(self, fetch, workers=2, retention=3600, max_usernames=500, fetch_many=None, chunk_size=1):
+        self.fetch = fetch
+        self.fetch_many = fetch_many
+        self.chunk_size = chunk_size if fetch_many else 1
+        self.workers = workers
+        self.retention = retention
+        self.max_usernames = max_usernames
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, usernames):
+        """Queue a job and return it immediately"""
+        self.evict_expired()
+        job = BatchJob(usernames)
+        with self._lock:
+            self._jobs[job.id] = job
+        if self.chunk_size > 1:
+            for i in range(0, len(usernames), self.chunk_size):
+                self.executor.submit(self._run_chunk, job, usernames[i:i + self.chunk_size])
+        else:
+            for username in usernames:
+                self.executor.submit(self._run_one, job, username)
+        logger.info(f"📦 Queued job {job.id} with {len(usernames)} usernames")
+        return job
+
+    def _mark_started(self, job):
+        with job.lock:
+            if job.started_at is None:
+                job.started_at = time.time()
+
+    def _run_one(self, job, username):
+        self._mark_started(job)
+        try:
+            result = self.fetch(username)
+        except Exception as e:
+            result = {'username': username, 'success': False, 'message': f'Scraping error: {str(e)}'}
+        self._record(job, username, result)
+
+    def _run_chunk(self, job, usernames):
+        self._mark_started(job)
+        try:
+            results = self.fetch_many(usernames)
+        except Exception as e:
+            results = {}
+            error = f'Scraping error: {str(e)}'
+        else:
+            error = 'Failed to scrape data'
+        for username in usernames:
+            result = results.get(username) or {'username': username, 'success': False, 'message': error}
+            self._record(job, username, result)
+
+    def _record(self, job, username, result):
+        with job.lock:
+            if result.get('success'):
+                job.results[username] = result
+            else:
+                job.failures[username] = {
+                    'username': username,
+                    'message': result.get('message', 'Failed to scrape data')
+                }
+            if len(job.results) + len(job.failures) == len(job.usernames):
+                job.finished_at = time.time()
+                logger.info(f"✅ Job {job.id} finished: {len(job.results)} ok, {len(job.failures)} failed")
+
+    def get(self, job_id):
+        self.evict_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def evict_expired(self):
+        """Drop completed jobs older than the retention period"""
+        cutoff = time.time() - self.retention
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished_at is not None and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            'workers': self.workers,
+            'jobs': len(jobs),
+            'active': sum(1 for job in jobs if job.finished_at is None),
+            'retention': self.retention
+        }
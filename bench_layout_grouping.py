@@ -0,0 +1,127 @@
+"""
+Benchmark digit-to-keyword grouping on synthetic tokcount-like layouts
+
+Compares layout_grouping.group_stats_by_layout with the original
+keyword x digit loop (kept here as the reference) and checks both return
+the same stats.
+
+    python bench_layout_grouping.py
+    python bench_layout_grouping.py --digits 1000 5000 20000 --repeat 5
+"""
+
+import argparse
+import random
+import re
+import time
+
+from layout_grouping import classify_nodes, group_stats_by_layout, STAT_KEYWORDS
+
+
+def group_stats_reference(digits, keywords):
+    """The original O(K*D + D^2) grouping, on (text, x, y) tuples"""
+    stats = {}
+    for keyword, kx, ky in keywords:
+        nearby_digits = []
+        for text, x, y in digits:
+            y_distance = ky - y
+            x_distance = abs(kx - x)
+            if 0 <= y_distance <= 100 and x_distance <= 200:
+                nearby_digits.append({'text': text, 'position': (y, x)})
+
+        if nearby_digits:
+            nearby_digits.sort(key=lambda d: (d['position'][0], d['position'][1]))
+            unique_digits = []
+            for digit in nearby_digits:
+                is_duplicate = False
+                for existing in unique_digits:
+                    y_diff = abs(digit['position'][0] - existing['position'][0])
+                    x_diff = abs(digit['position'][1] - existing['position'][1])
+                    if y_diff < 10 and x_diff < 10:
+                        is_duplicate = True
+                        break
+                if not is_duplicate:
+                    unique_digits.append(digit)
+
+            if unique_digits:
+                number_str = ''.join(d['text'] for d in unique_digits)
+                number_str = re.sub(r',+', ',', number_str).strip(',')
+                try:
+                    if int(number_str.replace(',', '')) >= 0:
+                        stats[keyword.lower()] = number_str
+                except ValueError:
+                    continue
+    return stats
+
+
+def synthetic_layout(total_digits, dense=False, seed=0):
+    """Four stat cards with odometer ribbons plus extra digit nodes
+
+    Each odometer column stacks a 0-9 ribbon at the same x, and the visible
+    digit sits on the baseline row, the way tokcount's counters render.
+    Extra digits go far below the cards (spread) or into the cards' own
+    windows (dense, the worst case for deduplication).
+    """
+    rng = random.Random(seed)
+    nodes = []
+    for card, keyword in enumerate(STAT_KEYWORDS):
+        left = 100 + card * 450
+        value = f"{rng.randint(0, 10 ** 9):,}"
+        x = left
+        for ch in value:
+            if ch == ',':
+                nodes.append((',', x, 300))
+            else:
+                for ribbon in range(10):
+                    nodes.append((str(ribbon), x, 300 - ribbon * 3))
+                nodes.append((ch, x, 300))
+            x += 18
+        nodes.append((keyword, left + 40, 360))
+
+    while len(nodes) < total_digits:
+        if dense:
+            card = rng.randrange(len(STAT_KEYWORDS))
+            x = 100 + card * 450 + rng.randint(-160, 240)
+            y = rng.randint(260, 360)
+        else:
+            x, y = rng.randint(0, 1920), rng.randint(400, 20000)
+        nodes.append((str(rng.randint(0, 9)), x, y))
+
+    rng.shuffle(nodes)
+    return nodes
+
+
+def best_time(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--digits', type=int, nargs='+', default=[500, 2000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-reference-above', type=int, default=20000,
+                        help='do not time the reference loop on larger layouts')
+    args = parser.parse_args()
+
+    print(f"{'layout':>7} {'nodes':>8} {'digits':>8} {'reference ms':>14} {'grouped ms':>12} {'speedup':>8}  match")
+    for layout in ('spread', 'dense'):
+        for total in args.digits:
+            digits, keywords = classify_nodes(synthetic_layout(total, dense=(layout == 'dense')))
+            fast_time, fast = best_time(lambda: group_stats_by_layout(digits, keywords), args.repeat)
+            row = f"{layout:>7} {total:>8} {len(digits):>8}"
+
+            if total <= args.skip_reference_above:
+                ref_time, ref = best_time(lambda: group_stats_reference(digits, keywords), args.repeat)
+                print(f"{row} {ref_time * 1000:>14.2f} {fast_time * 1000:>12.2f} "
+                      f"{ref_time / fast_time:>7.1f}x  {'yes' if ref == fast else 'NO'}")
+            else:
+                print(f"{row} {'-':>14} {fast_time * 1000:>12.2f} {'-':>8}  -")
+
+
+if __name__ == '__main__':
+    main()
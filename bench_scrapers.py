@@ -0,0 +1,285 @@
+"""
+End-to-end scraper benchmark against the local tokcount stand-in
+
+Drives TokCountScraperRailway and TokCountFixedDigits (real Chrome) at
+several concurrency levels, one scraper per worker, and reports latency
+percentiles, throughput, driver startup and peak memory per driver
+(chromedriver plus its Chrome processes). Results are checked against the
+counts the stand-in rendered and saved as JSON so runs can be compared.
+
+    python bench_scrapers.py
+    python bench_scrapers.py --scraper railway --concurrency 1 2 4 --requests 12 --anim-ms 5000 --layout noisy
+    python bench_scrapers.py --compare bench_results/before.json bench_results/after.json
+
+Without --base-url an in-process stand-in is started on a free port; with
+it (e.g. a tokcount_standin.py elsewhere) accuracy is only checked when
+--check-accuracy is given.
+"""
+
+import argparse
+import json
+import os
+import platform
+import queue
+import threading
+import time
+from urllib.parse import urlencode
+
+from proc_stats import children_map, driver_pid, process_tree_rss
+from tokcount_standin import LAYOUTS, expected_stats, make_server
+
+STAT_KEYS = ('followers', 'likes', 'following', 'videos')
+
+
+def create_scraper(name, base_url):
+    if name == 'railway':
+        from tokcount_scraper_railway import TokCountScraperRailway
+        return TokCountScraperRailway(headless=True, base_url=base_url)
+    from tokcount_scraper_fixed_digits import TokCountFixedDigits
+    scraper = TokCountFixedDigits(headless=True, base_url=base_url)
+    scraper.start_driver()
+    return scraper
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * pct // 100))
+    return values[int(rank) - 1]
+
+
+def accuracy(result, expected):
+    """Fraction of the four stats that match, ignoring thousands separators"""
+    if not result:
+        return 0.0
+    matched = sum(
+        1 for key in STAT_KEYS
+        if str(result.get(key, '')).replace(',', '') == expected[key].replace(',', '')
+    )
+    return matched / len(STAT_KEYS)
+
+
+class MemorySampler:
+    """Polls the process tree of every driver and keeps each one's peak RSS"""
+
+    def __init__(self, scrapers, interval=0.5):
+        self.pids = [driver_pid(scraper.driver) for scraper in scrapers]
+        self.interval = interval
+        self.peaks = [0] * len(self.pids)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='bench-memory', daemon=True)
+
+    def sample(self):
+        children = children_map()
+        for i, pid in enumerate(self.pids):
+            if pid is not None:
+                self.peaks[i] = max(self.peaks[i], process_tree_rss(pid, children) or 0)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+    def summary(self):
+        peaks = [peak / (1024 * 1024) for peak in self.peaks if peak]
+        if not peaks:
+            return None  # no /proc (not Linux) or no driver pids
+        return {'max': round(max(peaks), 1), 'mean': round(sum(peaks) / len(peaks), 1)}
+
+
+def run_level(name, concurrency, usernames, base_url, expected_for):
+    """Scrape usernames with concurrency scrapers; one result row"""
+    startup_start = time.perf_counter()
+    scrapers = []
+    try:
+        for _ in range(concurrency):
+            scrapers.append(create_scraper(name, base_url))
+        startup = (time.perf_counter() - startup_start) / concurrency
+
+        pending = queue.Queue()
+        for username in usernames:
+            pending.put(username)
+        latencies = []
+        scores = []
+        failures = [0]
+        lock = threading.Lock()
+
+        def work(scraper):
+            while True:
+                try:
+                    username = pending.get_nowait()
+                except queue.Empty:
+                    return
+                start = time.perf_counter()
+                try:
+                    result = scraper.scrape_user_data(username)
+                except Exception as e:
+                    print(f"❌ {name} {username}: {e}")
+                    result = None
+                elapsed = time.perf_counter() - start
+                with lock:
+                    if result is None:
+                        failures[0] += 1
+                    else:
+                        latencies.append(elapsed)
+                    if expected_for is not None:
+                        scores.append(accuracy(result, expected_for(username)))
+
+        with MemorySampler(scrapers) as memory:
+            wall_start = time.perf_counter()
+            workers = [threading.Thread(target=work, args=(scraper,)) for scraper in scrapers]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            wall = time.perf_counter() - wall_start
+    finally:
+        for scraper in scrapers:
+            scraper.close_driver()
+
+    latencies.sort()
+    return {
+        'scraper': name,
+        'concurrency': concurrency,
+        'requests': len(usernames),
+        'ok': len(latencies),
+        'failed': failures[0],
+        'accuracy': round(sum(scores) / len(scores), 4) if scores else None,
+        'latency_seconds': {
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'mean': sum(latencies) / len(latencies) if latencies else None
+        },
+        'throughput_per_minute': round(len(latencies) / wall * 60, 2) if wall else None,
+        'wall_seconds': round(wall, 2),
+        'driver_startup_seconds': round(startup, 2),
+        'peak_rss_mb_per_driver': memory.summary()
+    }
+
+
+def format_seconds(value):
+    return f"{value:.2f}" if value is not None else '-'
+
+
+def print_table(runs):
+    print(f"{'scraper':>8} {'conc':>5} {'ok':>5} {'fail':>5} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} "
+          f"{'/min':>7} {'startup s':>10} {'peak MB':>8} {'accuracy':>9}")
+    for run in runs:
+        latency = run['latency_seconds']
+        memory = run['peak_rss_mb_per_driver']
+        score = '-' if run['accuracy'] is None else f"{run['accuracy'] * 100:.0f}%"
+        print(f"{run['scraper']:>8} {run['concurrency']:>5} {run['ok']:>5} {run['failed']:>5} "
+              f"{format_seconds(latency['p50']):>7} {format_seconds(latency['p95']):>7} "
+              f"{format_seconds(latency['p99']):>7} {run['throughput_per_minute'] or 0:>7.1f} "
+              f"{run['driver_startup_seconds']:>10.2f} {memory['max'] if memory else '-':>8} {score:>9}")
+
+
+def change(before, after):
+    if before is None or after is None:
+        return '-'
+    if not before:
+        return f"{after:.2f}"
+    return f"{(after - before) / before * 100:+.0f}%"
+
+
+def compare(path_a, path_b):
+    with open(path_a) as f:
+        before = json.load(f)
+    with open(path_b) as f:
+        after = json.load(f)
+    old_runs = {(run['scraper'], run['concurrency']): run for run in before['runs']}
+
+    print(f"{path_a} -> {path_b}")
+    print(f"{'scraper':>8} {'conc':>5} {'p50':>8} {'p95':>8} {'p99':>8} {'/min':>8} {'peak MB':>8} {'accuracy':>9}")
+    for run in after['runs']:
+        old = old_runs.get((run['scraper'], run['concurrency']))
+        if old is None:
+            continue
+        old_memory = old['peak_rss_mb_per_driver'] or {}
+        new_memory = run['peak_rss_mb_per_driver'] or {}
+        accuracy_change = (
+            f"{(run['accuracy'] - old['accuracy']) * 100:+.1f}pt"
+            if run['accuracy'] is not None and old['accuracy'] is not None else '-'
+        )
+        print(f"{run['scraper']:>8} {run['concurrency']:>5} "
+              + ' '.join(
+                  f"{change(old['latency_seconds'][p], run['latency_seconds'][p]):>8}"
+                  for p in ('p50', 'p95', 'p99')
+              )
+              + f" {change(old['throughput_per_minute'], run['throughput_per_minute']):>8}"
+              f" {change(old_memory.get('max'), new_memory.get('max')):>8} {accuracy_change:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scraper', nargs='+', choices=['railway', 'fixed'], default=['railway', 'fixed'])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--requests', type=int, default=8, help='scrapes per concurrency level')
+    parser.add_argument('--anim-ms', type=int, default=3000, help='odometer animation time on the stand-in')
+    parser.add_argument('--layout', choices=sorted(LAYOUTS), default='grid')
+    parser.add_argument('--digits', type=int, help='follower/like digit count on the stand-in')
+    parser.add_argument('--base-url', help='page to scrape instead of an in-process stand-in')
+    parser.add_argument('--check-accuracy', action='store_true',
+                        help='with --base-url, check results against tokcount_standin counts')
+    parser.add_argument('--output', help='JSON results path (default bench_results/<timestamp>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='compare two result files')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    server = None
+    page = {'anim': args.anim_ms, 'layout': args.layout}
+    if args.digits:
+        page['digits'] = args.digits
+    if args.base_url:
+        base_url = args.base_url
+    else:
+        server = make_server(port=0)
+        threading.Thread(target=server.serve_forever, name='standin', daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/?{urlencode(page)}"
+        print(f"🧪 Stand-in on {base_url}")
+    check = server is not None or args.check_accuracy
+    expected_for = (lambda username: expected_stats(username, args.digits)) if check else None
+
+    runs = []
+    try:
+        for name in args.scraper:
+            for concurrency in args.concurrency:
+                usernames = [f"bench_{name}_{concurrency}_{i}" for i in range(args.requests)]
+                print(f"⏱️ {name} x{concurrency}: {len(usernames)} scrapes")
+                runs.append(run_level(name, concurrency, usernames, base_url, expected_for))
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    results = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'base_url': base_url,
+        'page': page,
+        'host': {'platform': platform.platform(), 'python': platform.python_version(), 'cpus': os.cpu_count()},
+        'runs': runs
+    }
+    output = args.output or os.path.join('bench_results', f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print_table(runs)
+    print(f"💾 Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import base64
+import os
+import queue
+import random
+import re
+import threading
+import time
+import logging
+from collections import deque
+
+from metrics import scrape_phase
+
+logger = logging.getLogger(__name__)
+
+MODES = ('off', 'failure', 'sampled')
+
+
+class ArtifactRecorder:
+    """Screenshots for debugging, written off the request path
+
+    mode: 'off', 'failure' (only scrapes with missing stats or errors) or
+    'sampled' (failures plus sample_rate of successes). The request thread
+    only grabs the PNG from Chrome; decoding and disk writes happen on a
+    background thread, into a ring directory capped by file count and bytes.
+    Defaults come from ARTIFACT_MODE, ARTIFACT_SAMPLE_RATE, ARTIFACT_DIR,
+    ARTIFACT_MAX_FILES and ARTIFACT_MAX_BYTES.
+    """
+
+    def __init__(self, mode=None, sample_rate=None, directory=None, max_files=None, max_bytes=None,
+                 queue_size=16):
+        self.mode = mode or os.environ.get('ARTIFACT_MODE', 'failure')
+        if self.mode not in MODES:
+            logger.warning(f"Unknown ARTIFACT_MODE {self.mode!r}, using 'failure'")
+            self.mode = 'failure'
+        self.sample_rate = float(sample_rate if sample_rate is not None else os.environ.get('ARTIFACT_SAMPLE_RATE', 0.01))
+        self.directory = directory or os.environ.get('ARTIFACT_DIR', 'debug_artifacts')
+        self.max_files = int(max_files if max_files is not None else os.environ.get('ARTIFACT_MAX_FILES', 50))
+        self.max_bytes = int(max_bytes if max_bytes is not None else os.environ.get('ARTIFACT_MAX_BYTES', 50 * 1024 * 1024))
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._files = None  # deque of (path, size), oldest first
+        self._bytes = 0
+        self._thread = None
+        self._lock = threading.Lock()
+        self.captured = 0
+        self.dropped = 0
+
+    def should_capture(self, failed):
+        if self.mode == 'off':
+            return False
+        if failed:
+            return True
+        return self.mode == 'sampled' and random.random() < self.sample_rate
+
+    def capture(self, driver, name, failed=False):
+        """Grab a screenshot if the mode wants one; returns True when queued"""
+        if not self.should_capture(failed):
+            return False
+        try:
+            with scrape_phase('screenshot'):
+                png_base64 = driver.get_screenshot_as_base64()
+        except Exception as e:
+            logger.debug(f"Screenshot failed for {name}: {e}")
+            return False
+
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', name)[:80]
+        label = 'failure' if failed else 'sample'
+        try:
+            now = time.time()
+            stamp = f"{time.strftime('%Y%m%d_%H%M%S', time.localtime(now))}_{int(now * 1000) % 1000:03d}"
+            self._queue.put_nowait((f"{stamp}_{label}_{safe_name}.png", png_base64))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+        self._ensure_writer()
+        return True
+
+    def _ensure_writer(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._writer, name='artifact-writer', daemon=True)
+                self._thread.start()
+
+    def _load_existing(self):
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith('.png') and os.path.isfile(path):
+                st = os.stat(path)
+                entries.append((st.st_mtime, path, st.st_size))
+        entries.sort()
+        self._files = deque((path, size) for _, path, size in entries)
+        self._bytes = sum(size for _, size in self._files)
+
+    def _enforce_limits(self):
+        while self._files and (len(self._files) > self.max_files or self._bytes > self.max_bytes):
+            path, size = self._files.popleft()
+            self._bytes -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _writer(self):
+        while True:
+            filename, png_base64 = self._queue.get()
+            try:
+                if self._files is None:
+                    self._load_existing()
+                data = base64.b64decode(png_base64)
+                path = os.path.join(self.directory, filename)
+                with open(path, 'wb') as f:
+                    f.write(data)
+                self._files.append((path, len(data)))
+                self._bytes += len(data)
+                self._enforce_limits()
+                with self._lock:
+                    self.captured += 1
+                logger.info(f"📸 Debug artifact: {path}")
+            except Exception as e:
+                logger.warning(f"Could not write debug artifact {filename}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'sample_rate': self.sample_rate,
+                'captured': self.captured,
+                'dropped': self.dropped,
+                'pending': self._queue.qsize(),
+                'files': len(self._files) if self._files is not None else None,
+                'bytes': self._bytes
+            }
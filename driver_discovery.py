@@ -0,0 +1,243 @@
+import json
+import os
+import subprocess
+import threading
+import logging
+import time
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+
+from metrics import observe_phase
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHROME_PATHS = [
+    '/usr/bin/chromium',
+    '/usr/bin/chromium-browser',
+    '/usr/bin/google-chrome',
+    '/usr/bin/google-chrome-stable',
+    '/app/.chrome-for-testing/chrome-linux64/chrome'
+]
+
+DEFAULT_DRIVER_PATHS = [
+    '/usr/bin/chromedriver'
+]
+
+# Stands for "let webdriver-manager download a matching chromedriver"
+WEBDRIVER_MANAGER = 'webdriver-manager'
+
+
+def default_manifest_path():
+    return os.environ.get(
+        'DRIVER_MANIFEST',
+        os.path.join(os.path.expanduser('~'), '.cache', 'tikscr', 'driver_manifest.json')
+    )
+
+
+def binary_version(path):
+    try:
+        output = subprocess.run([path, '--version'], capture_output=True, text=True, timeout=15)
+        return output.stdout.strip()
+    except Exception:
+        return ''
+
+
+class DriverDiscovery:
+    """Resolve a working Chrome binary / chromedriver pair once and remember it
+
+    The pair is stored in a small JSON manifest together with each file's
+    mtime, size and --version output, and reused while those still match.
+    Pairs that failed to launch are remembered the same way and skipped
+    until one of their files changes.
+    """
+
+    def __init__(self, manifest_path=None, chrome_paths=None, driver_paths=None):
+        self.manifest_path = manifest_path or default_manifest_path()
+        self.chrome_paths = chrome_paths if chrome_paths is not None else (
+            DEFAULT_CHROME_PATHS + [os.environ.get('GOOGLE_CHROME_BIN'), None]
+        )
+        self.driver_paths = driver_paths if driver_paths is not None else (
+            DEFAULT_DRIVER_PATHS + [os.environ.get('CHROMEDRIVER_PATH'), WEBDRIVER_MANAGER]
+        )
+        self._lock = threading.Lock()
+        self._manifest = None
+        self._versions = {}
+
+    def fingerprint(self, path):
+        """mtime/size/version of a binary; None for 'default' entries"""
+        if not path:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = (path, st.st_mtime, st.st_size)
+        if key not in self._versions:
+            self._versions[key] = binary_version(path)
+        return {'mtime': st.st_mtime, 'size': st.st_size, 'version': self._versions[key]}
+
+    def _same_binary(self, path, recorded):
+        """True when path still matches a recorded fingerprint
+
+        An mtime/size change alone (e.g. a touched or re-copied file) is
+        accepted if --version still reports the same version.
+        """
+        if not path or path == WEBDRIVER_MANAGER:
+            # Default entries and the webdriver-manager sentinel have no binary
+            # to fingerprint; _matches already compared them by name
+            return recorded is None
+        if recorded is None:
+            return False
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if st.st_mtime == recorded.get('mtime') and st.st_size == recorded.get('size'):
+            return True
+        current = self.fingerprint(path)
+        return current is not None and current['version'] == recorded.get('version') and bool(current['version'])
+
+    def load_manifest(self):
+        if self._manifest is None:
+            try:
+                with open(self.manifest_path) as f:
+                    self._manifest = json.load(f)
+            except (OSError, ValueError):
+                self._manifest = {}
+            self._manifest.setdefault('working', None)
+            self._manifest.setdefault('failed', [])
+        return self._manifest
+
+    def save_manifest(self):
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            tmp_path = f"{self.manifest_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self._manifest, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            logger.warning(f"Could not write driver manifest {self.manifest_path}: {e}")
+
+    def _record(self, chrome, driver):
+        return {
+            'chrome': chrome,
+            'driver': driver,
+            'chrome_fingerprint': self.fingerprint(chrome),
+            'driver_fingerprint': self.fingerprint(driver)
+        }
+
+    def _matches(self, record, chrome, driver):
+        return (
+            record.get('chrome') == chrome and record.get('driver') == driver
+            and self._same_binary(chrome, record.get('chrome_fingerprint'))
+            and self._same_binary(driver, record.get('driver_fingerprint'))
+        )
+
+    def candidates(self):
+        """(chrome, driver) pairs to probe, in preference order"""
+        chromes = [path for path in self.chrome_paths if path is None or os.path.exists(path)]
+        drivers = [
+            path for path in self.driver_paths
+            if path == WEBDRIVER_MANAGER or (path and os.path.exists(path))
+        ]
+        seen = set()
+        for chrome in chromes:
+            for driver in drivers:
+                if (chrome, driver) not in seen:
+                    seen.add((chrome, driver))
+                    yield chrome, driver
+
+    def _resolve_driver_path(self, driver):
+        if driver != WEBDRIVER_MANAGER:
+            return driver
+        from webdriver_manager.chrome import ChromeDriverManager
+        logger.info("Using webdriver-manager")
+        return ChromeDriverManager().install()
+
+    def _start(self, chrome, driver_path, options):
+        options.binary_location = chrome or ''
+        return webdriver.Chrome(service=Service(driver_path), options=options)
+
+    def _mark_failed(self, manifest, record):
+        manifest['failed'] = [
+            r for r in manifest['failed']
+            if (r.get('chrome'), r.get('driver')) != (record['chrome'], record['driver'])
+        ]
+        manifest['failed'].append(record)
+
+    def launch(self, options):
+        """Start Chrome with the cached pair, probing candidates only when needed"""
+        start = time.perf_counter()
+        driver = self._launch(options)
+        observe_phase('driver_startup', time.perf_counter() - start)
+        return driver
+
+    def _launch(self, options):
+        with self._lock:
+            manifest = self.load_manifest()
+            working = manifest['working']
+            if working and not self._matches(working, working.get('chrome'), working.get('driver')):
+                logger.info("Chrome or chromedriver changed on disk, rediscovering")
+                working = None
+
+        if working:
+            try:
+                # Launched outside the lock so pooled drivers can start in parallel
+                driver = self._start(working['chrome'], working['driver'], options)
+                logger.info(f"✅ Chrome started from cached pair {working['chrome'] or 'default'} / {working['driver']}")
+                return driver
+            except Exception as e:
+                logger.warning(f"Cached Chrome/driver pair failed, rediscovering: {e}")
+                with self._lock:
+                    if manifest['working'] is working:
+                        self._mark_failed(manifest, working)
+                        manifest['working'] = None
+                        self.save_manifest()
+
+        with self._lock:
+            pairs = list(self.candidates())
+            untried = [
+                pair for pair in pairs
+                if not any(self._matches(record, *pair) for record in manifest['failed'])
+            ]
+            if not untried and pairs:
+                # Everything failed before; the cause may have been transient
+                logger.warning("All known Chrome/driver pairs failed before, retrying them")
+                manifest['failed'] = []
+                untried = pairs
+
+        # Probed outside the lock so other pool slots are not held behind a launch
+        resolved = {}
+        for chrome, driver in untried:
+            try:
+                if driver not in resolved:
+                    resolved[driver] = self._resolve_driver_path(driver)
+                driver_path = resolved[driver]
+                logger.info(f"Trying Chrome at {chrome or 'default'} with ChromeDriver {driver_path}")
+                instance = self._start(chrome, driver_path, options)
+            except Exception as e:
+                logger.warning(f"Failed with Chrome {chrome} / driver {driver}: {e}")
+                with self._lock:
+                    self._mark_failed(manifest, self._record(chrome, driver))
+                continue
+
+            with self._lock:
+                manifest['working'] = self._record(chrome, driver_path)
+                self.save_manifest()
+            logger.info(f"✅ Chrome driver initialized, cached in {self.manifest_path}")
+            return instance
+
+        with self._lock:
+            self.save_manifest()
+        raise RuntimeError("Could not initialize Chrome driver")
+
+    def forget(self):
+        """Drop the cached pair and failure list"""
+        with self._lock:
+            self._manifest = {'working': None, 'failed': []}
+            self.save_manifest()
+
+
+# Shared by every scraper in the process so recycled drivers skip the file read too
+default_discovery = DriverDiscovery()
@@ -0,0 +1,214 @@
+import queue
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+from memory_governor import MemoryPressure
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no scraper becomes free within the wait timeout"""
+
+
+class PooledScraper:
+    """A scraper plus the bookkeeping the pool needs to recycle it"""
+
+    def __init__(self, scraper):
+        self.scraper = scraper
+        self.pages = 0
+        self.created_at = time.time()
+        self.last_used = self.created_at
+
+
+class ScraperPool:
+    """Bounded pool of warm scraper instances, one Chrome session each
+
+    Slots start empty (None) and are launched on first checkout or by
+    warm(). A checked-out scraper is used by exactly one thread at a time.
+    With a MemoryGovernor, drivers over its per-driver limit are recycled
+    on checkin and checkouts wait (then fail) while memory is near its
+    ceiling.
+    """
+
+    def __init__(self, factory, size=2, max_pages=50, wait_timeout=60, memory=None):
+        self.factory = factory
+        self.size = size
+        self.max_pages = max_pages
+        self.wait_timeout = wait_timeout
+        self.memory = memory
+        # LIFO so the most recently used (warmest) driver is handed out first
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(None)
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.waiting = 0
+        self.launched = 0
+        self.recycled = 0
+
+    def _launch(self):
+        scraper = self.factory()
+        if getattr(scraper, 'driver', None) is None:
+            raise RuntimeError("Could not initialize Chrome driver")
+        with self._lock:
+            self.launched += 1
+        return PooledScraper(scraper)
+
+    def _close(self, entry):
+        try:
+            entry.scraper.close_driver()
+        except Exception as e:
+            logger.warning(f"Error closing pooled driver: {e}")
+        with self._lock:
+            self.launched -= 1
+
+    def is_healthy(self, entry):
+        """Cheap liveness check: the session must still answer a command"""
+        try:
+            driver = entry.scraper.driver
+            return driver is not None and len(driver.window_handles) > 0
+        except Exception:
+            return False
+
+    def checkout(self, timeout=None):
+        """Take a ready scraper out of the pool, launching or recycling as needed"""
+        timeout = self.wait_timeout if timeout is None else timeout
+        with self._lock:
+            self.waiting += 1
+        try:
+            entry = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise PoolTimeout(f"No scraper available after {timeout}s") from None
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+        if self.memory is not None:
+            def relieve():
+                # Close every idle driver, this one included (a fresh launch is
+                # smaller); in-flight ones free memory when checked in
+                nonlocal entry
+                self.cleanup_idle(0)
+                if entry is not None:
+                    self._close(entry)
+                    entry = None
+
+            try:
+                self.memory.admit(relieve=relieve)
+            except MemoryPressure:
+                self._idle.put(None)
+                raise
+
+        try:
+            if entry is not None and entry.pages >= self.max_pages:
+                logger.info(f"♻️ Recycling driver after {entry.pages} pages")
+                self._close(entry)
+                with self._lock:
+                    self.recycled += 1
+                entry = None
+            elif entry is not None and not self.is_healthy(entry):
+                logger.warning("♻️ Replacing unhealthy driver")
+                self._close(entry)
+                with self._lock:
+                    self.recycled += 1
+                entry = None
+
+            if entry is None:
+                logger.info("🔧 Launching pooled scraper...")
+                entry = self._launch()
+        except Exception:
+            # Give the slot back so the pool does not shrink on launch failures
+            self._idle.put(None)
+            raise
+
+        with self._lock:
+            self.in_use += 1
+        return entry
+
+    def checkin(self, entry, broken=False):
+        """Return a scraper to the pool; broken ones are closed and their slot emptied"""
+        entry.pages += 1
+        entry.last_used = time.time()
+        with self._lock:
+            self.in_use -= 1
+        if broken:
+            self._close(entry)
+            self._idle.put(None)
+        elif self.memory is not None and self.memory.should_recycle(entry.scraper.driver):
+            self._close(entry)
+            with self._lock:
+                self.recycled += 1
+            self._idle.put(None)
+        else:
+            self._idle.put(entry)
+
+    @contextmanager
+    def scraper(self, timeout=None):
+        """Check out a scraper for the duration of a with-block"""
+        entry = self.checkout(timeout)
+        broken = False
+        try:
+            yield entry.scraper
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.checkin(entry, broken)
+
+    def warm(self):
+        """Launch every empty slot now instead of on first request"""
+        entries = []
+        for _ in range(self.size):
+            try:
+                entries.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for i, entry in enumerate(entries):
+            if entry is None:
+                try:
+                    entries[i] = self._launch()
+                except Exception as e:
+                    logger.error(f"❌ Failed to pre-launch driver: {e}")
+        for entry in reversed(entries):
+            self._idle.put(entry)
+
+    def cleanup_idle(self, max_idle_time):
+        """Close drivers that have not been used for max_idle_time seconds"""
+        now = time.time()
+        entries = []
+        while True:
+            try:
+                entries.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        # Drained warmest first; put back coldest first so LIFO order survives
+        for entry in reversed(entries):
+            if entry is not None and now - entry.last_used > max_idle_time:
+                logger.info("🧹 Cleaning up idle scraper...")
+                self._close(entry)
+                entry = None
+            self._idle.put(entry)
+
+    def close_all(self):
+        """Close every idle driver (used on shutdown)"""
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not None:
+                self._close(entry)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'launched': self.launched,
+                'in_use': self.in_use,
+                'waiting': self.waiting,
+                'recycled': self.recycled,
+                'max_pages': self.max_pages
+            }
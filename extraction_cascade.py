@@ -0,0 +1,214 @@
+import threading
+import time
+import logging
+from abc import ABC, abstractmethod
+from collections import deque
+
+from layout_grouping import STAT_KEYWORDS, extract_stat_from_tree, subtree_sizes
+from layout_snapshot import capture_layout_signature, capture_tree_snapshot
+from metrics import scrape_phase
+from tracing import profiled
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionStrategy(ABC):
+    """One way of reading stats off a loaded page
+
+    extract(scraper, keywords) returns {stat key: value} for the keywords
+    it could read. cost is the expected seconds per call before any have
+    been measured; phase is the scrape phase it is timed as.
+    """
+
+    name = None
+    phase = None
+    cost = 1.0
+
+    @abstractmethod
+    def extract(self, scraper, keywords):
+        """{stat key: value} for the keywords read off scraper's page"""
+
+
+class VisualLayoutStrategy(ExtractionStrategy):
+    """Digits grouped under labels by position, from one layout snapshot"""
+
+    name = 'visual_layout'
+    phase = 'layout_extraction'
+    cost = 0.05
+
+    def extract(self, scraper, keywords):
+        stats = scraper.extract_stats_by_visual_layout()
+        return {key: stats[key] for key in (keyword.lower() for keyword in keywords) if key in stats}
+
+
+class KeywordTreeStrategy(ExtractionStrategy):
+    """extract_stat_by_keyword's DOM rules on one tree snapshot (one round trip)"""
+
+    name = 'keyword_tree'
+    phase = 'keyword_tree'
+    cost = 0.2
+
+    def extract(self, scraper, keywords):
+        tree = capture_tree_snapshot(scraper.driver)
+        if tree is None:
+            return {}
+        sizes = subtree_sizes(tree)
+        stats = {}
+        for keyword in keywords:
+            value = extract_stat_from_tree(tree, keyword, sizes)
+            if value:
+                stats[keyword.lower()] = value
+        return stats
+
+
+class KeywordDomStrategy(ExtractionStrategy):
+    """extract_stat_by_keyword over WebDriver, two round trips per element"""
+
+    name = 'keyword_dom'
+    phase = 'keyword_fallback'
+    cost = 2.0
+
+    def extract(self, scraper, keywords):
+        stats = {}
+        for keyword in keywords:
+            value = scraper.extract_stat_by_keyword(keyword)
+            if value:
+                stats[keyword.lower()] = value
+        return stats
+
+
+DEFAULT_STRATEGIES = (VisualLayoutStrategy(), KeywordTreeStrategy(), KeywordDomStrategy())
+
+
+class ExtractionCascade:
+    """Runs extraction strategies in order of expected cost until every stat is found
+
+    Per page layout (see capture_layout_signature) it keeps each
+    strategy's last window attempts: stats found of stats asked and
+    seconds taken. Strategies run cheapest first, where cost is the mean
+    time divided by the success rate (the declared cost before any
+    attempts). A strategy that found nothing in its last min_attempts
+    attempts on this layout is skipped. Every probe_every-th scrape of a
+    layout runs in declared-cost order with nothing skipped, so strategies
+    ranked down by old failures get measured again. Shared by every
+    scraper in the process.
+    """
+
+    def __init__(self, strategies=DEFAULT_STRATEGIES, window=20, min_attempts=5, probe_every=20):
+        self.strategies = list(strategies)
+        self.window = window
+        self.min_attempts = min_attempts
+        self.probe_every = probe_every
+        self._history = {}  # (layout, strategy name) -> deque of (found, asked, seconds)
+        self._runs = {}
+        self._lock = threading.Lock()
+        self.skipped = {strategy.name: 0 for strategy in self.strategies}
+        self.produced = {strategy.name: 0 for strategy in self.strategies}
+        self.complete = 0
+        self.incomplete = 0
+
+    def _summary(self, layout, strategy):
+        attempts = self._history.get((layout, strategy.name)) or ()
+        found = sum(attempt[0] for attempt in attempts)
+        asked = sum(attempt[1] for attempt in attempts)
+        seconds = sum(attempt[2] for attempt in attempts)
+        return {
+            'attempts': len(attempts),
+            'success_rate': found / asked if asked else None,
+            'mean_seconds': seconds / len(attempts) if attempts else None
+        }
+
+    def expected_cost(self, layout, strategy):
+        summary = self._summary(layout, strategy)
+        cost = summary['mean_seconds'] if summary['mean_seconds'] is not None else strategy.cost
+        rate = summary['success_rate'] if summary['success_rate'] is not None else 1.0
+        return cost / max(rate, 0.01)
+
+    def failing(self, layout, strategy):
+        attempts = self._history.get((layout, strategy.name)) or ()
+        recent = list(attempts)[-self.min_attempts:]
+        return len(recent) >= self.min_attempts and not any(attempt[0] for attempt in recent)
+
+    def plan(self, layout):
+        """Strategies to run for this layout, in order, and the ones skipped"""
+        with self._lock:
+            run = self._runs[layout] = self._runs.get(layout, 0) + 1
+            if run % self.probe_every == 0:
+                return sorted(self.strategies, key=lambda strategy: strategy.cost), []
+            ordered = sorted(self.strategies, key=lambda strategy: self.expected_cost(layout, strategy))
+            planned = [strategy for strategy in ordered if not self.failing(layout, strategy)]
+            skipped = [strategy for strategy in ordered if strategy not in planned]
+            for strategy in skipped:
+                self.skipped[strategy.name] += 1
+            return planned, skipped
+
+    def record(self, layout, strategy, found, asked, seconds):
+        with self._lock:
+            attempts = self._history.get((layout, strategy.name))
+            if attempts is None:
+                attempts = self._history[(layout, strategy.name)] = deque(maxlen=self.window)
+            attempts.append((found, asked, seconds))
+            self.produced[strategy.name] += found
+
+    def run(self, scraper, keywords=STAT_KEYWORDS):
+        """Extract every stat from scraper's loaded page
+
+        Returns (stats, sources): the values found and, per stat, the name
+        of the strategy that produced it.
+        """
+        layout = capture_layout_signature(scraper.driver, keywords) or 'unknown'
+        planned, skipped = self.plan(layout)
+        if skipped:
+            logger.info(f"⏭️ Skipping {[strategy.name for strategy in skipped]}, failing on layout {layout}")
+
+        stats = {}
+        sources = {}
+        for strategy in planned:
+            missing = [keyword for keyword in keywords if keyword.lower() not in stats]
+            if not missing:
+                break
+            start = time.perf_counter()
+            try:
+                with scrape_phase(strategy.phase, strategy=strategy.name), profiled(strategy.phase):
+                    found = strategy.extract(scraper, missing)
+            except Exception as e:
+                logger.warning(f"Extraction strategy {strategy.name} failed: {e}")
+                found = {}
+            found = {key: value for key, value in found.items() if key not in stats}
+            self.record(layout, strategy, len(found), len(missing), time.perf_counter() - start)
+            stats.update(found)
+            sources.update((key, strategy.name) for key in found)
+
+        with self._lock:
+            if len(stats) == len(keywords):
+                self.complete += 1
+            else:
+                self.incomplete += 1
+        return stats, sources
+
+    def stats(self):
+        with self._lock:
+            layouts = sorted(self._runs)
+            return {
+                'strategies': [strategy.name for strategy in self.strategies],
+                'complete': self.complete,
+                'incomplete': self.incomplete,
+                'produced': dict(self.produced),
+                'skipped': dict(self.skipped),
+                'layouts': {
+                    layout: {
+                        'scrapes': self._runs[layout],
+                        'strategies': {
+                            strategy.name: {
+                                key: round(value, 4) if isinstance(value, float) else value
+                                for key, value in self._summary(layout, strategy).items()
+                            }
+                            for strategy in self.strategies
+                        }
+                    }
+                    for layout in layouts
+                }
+            }
+
+
+default_cascade = ExtractionCascade()
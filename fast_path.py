@@ -0,0 +1,114 @@
+import os
+import time
+import threading
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Field names used for the four counters in the JSON tokcount's frontend
+# (and TikTok's own user stats payloads) carry
+COUNTER_FIELDS = {
+    'followers': ('followerCount', 'follower_count', 'followers'),
+    'likes': ('heartCount', 'heart', 'likes', 'likeCount', 'total_favorited'),
+    'following': ('followingCount', 'following_count', 'following'),
+    'videos': ('videoCount', 'aweme_count', 'videos')
+}
+
+
+def find_counter(data, names, depth=0):
+    """Depth-first search of nested JSON for the first integer under one of names"""
+    if depth > 6:
+        return None
+    if isinstance(data, dict):
+        for name in names:
+            value = data.get(name)
+            if isinstance(value, bool):
+                continue
+            if isinstance(value, int):
+                return value
+            if isinstance(value, str) and value.replace(',', '').isdigit():
+                return int(value.replace(',', ''))
+        children = data.values()
+    elif isinstance(data, list):
+        children = data
+    else:
+        return None
+    for child in children:
+        if isinstance(child, (dict, list)):
+            value = find_counter(child, names, depth + 1)
+            if value is not None:
+                return value
+    return None
+
+
+def parse_stats(data):
+    """Return {'followers': '12,850', ...} or None unless all four counters are present"""
+    stats = {}
+    for key, names in COUNTER_FIELDS.items():
+        value = find_counter(data, names)
+        if value is None:
+            return None
+        stats[key] = f"{value:,}"
+    return stats
+
+
+class FastPathScraper:
+    """Browser-free scraper: fetches the counter JSON over a keep-alive session
+
+    stats_url is a template with a {username} placeholder, taken from
+    TOKCOUNT_STATS_URL when not given; without it the fast path is off.
+    Point it at a local stand-in (tokcount_standin.py) to test.
+    """
+
+    def __init__(self, stats_url=None, timeout=5, pool_size=10):
+        self.stats_url = stats_url if stats_url is not None else os.environ.get('TOKCOUNT_STATS_URL')
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Accept': 'application/json'
+        })
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return bool(self.stats_url)
+
+    def scrape_user_data(self, username):
+        """Same result shape as the Selenium scrapers, or None if the fast path failed"""
+        if not self.enabled:
+            return None
+
+        url = self.stats_url.format(username=requests.utils.quote(username, safe=''))
+        start = time.monotonic()
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            stats = parse_stats(response.json())
+        except Exception as e:
+            logger.info(f"⚡ Fast path failed for {username}: {e}")
+            stats = None
+
+        with self._lock:
+            if stats is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if stats is None:
+            return None
+
+        elapsed = time.monotonic() - start
+        logger.info(f"⚡ Fast path hit for {username} in {elapsed * 1000:.0f}ms")
+        return dict(stats, username=username, fetch_seconds=round(elapsed, 3))
+
+    def stats(self):
+        with self._lock:
+            return {'enabled': self.enabled, 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,201 @@
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import logging
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+from layout_grouping import parse_count
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ('followers', 'likes', 'following', 'videos')
+
+# Block header: entry count, reserved, first timestamp, base value of each counter
+HEADER = struct.Struct('<IIq4q')
+# Entry: seconds since the previous sample, then the change of each counter
+ENTRY = struct.Struct('<I4i')
+BLOCK_ENTRIES = 256
+BLOCK_SIZE = HEADER.size + BLOCK_ENTRIES * ENTRY.size
+# Unpacks the first n entries of a block in one call
+ENTRY_RUNS = [struct.Struct('<' + 'I4i' * n) for n in range(BLOCK_ENTRIES)]
+
+INT32_MIN, INT32_MAX = -2 ** 31, 2 ** 31 - 1
+UINT32_MAX = 2 ** 32 - 1
+
+# Stored for a counter the scrape did not find
+MISSING = -1
+
+
+def history_filename(key):
+    return re.sub(r'[^a-z0-9_.-]', '_', key)[:100] + '.hist'
+
+
+class _Tail:
+    """Where the next sample of one user goes"""
+
+    def __init__(self, blocks, count, timestamp, values):
+        self.blocks = blocks
+        self.count = count
+        self.timestamp = timestamp
+        self.values = values
+
+
+class HistoryStore:
+    """Append-only per-user counter history, delta-encoded in fixed-size blocks
+
+    Each user has one file of BLOCK_SIZE blocks. A block holds the absolute
+    timestamp and counters of its first sample and up to 255 more samples
+    as 20-byte deltas (about half of storing them raw). Blocks are
+    found by binary search on their first timestamp and decoded straight
+    from a read-only mmap, so a range query only touches its own blocks.
+    Defaults come from HISTORY_DIR.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.environ.get('HISTORY_DIR', 'history_data')
+        self._lock = threading.Lock()
+        self._tails = {}
+        self.appended = 0
+
+    def path(self, key):
+        return os.path.join(self.directory, history_filename(key))
+
+    def _load_tail(self, path):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return _Tail(0, 0, None, None)
+        blocks = size // BLOCK_SIZE
+        if blocks == 0:
+            return _Tail(0, 0, None, None)
+        with open(path, 'rb') as f:
+            f.seek((blocks - 1) * BLOCK_SIZE)
+            data = f.read(BLOCK_SIZE)
+        count, timestamp, values = self._decode_last(data)
+        return _Tail(blocks, count, timestamp, values)
+
+    def _decode_last(self, block):
+        count, _, timestamp, *values = HEADER.unpack_from(block, 0)
+        for delta, *changes in ENTRY.iter_unpack(block[HEADER.size:HEADER.size + (count - 1) * ENTRY.size]):
+            timestamp += delta
+            values = [value + change for value, change in zip(values, changes)]
+        return count, timestamp, values
+
+    def append(self, key, result, timestamp=None):
+        """Store the counters of one scrape result ({'followers': '12,850', ...})"""
+        values = []
+        for name in COUNTERS:
+            value = parse_count(str(result.get(name, '')))
+            values.append(MISSING if value is None else value)
+        timestamp = int(timestamp if timestamp is not None else time.time())
+        path = self.path(key)
+
+        with self._lock:
+            tail = self._tails.get(key)
+            if tail is None:
+                os.makedirs(self.directory, exist_ok=True)
+                tail = self._tails[key] = self._load_tail(path)
+
+            with open(path, 'r+b' if tail.blocks else 'wb') as f:
+                if tail.timestamp is not None:
+                    # Samples are kept in time order; a clock step back is clamped
+                    timestamp = max(timestamp, tail.timestamp)
+                    delta = timestamp - tail.timestamp
+                    changes = [value - previous for value, previous in zip(values, tail.values)]
+                    fits = (
+                        tail.count < BLOCK_ENTRIES and delta <= UINT32_MAX
+                        and all(INT32_MIN <= change <= INT32_MAX for change in changes)
+                    )
+                else:
+                    fits = False
+
+                if fits:
+                    block_start = (tail.blocks - 1) * BLOCK_SIZE
+                    f.seek(block_start + HEADER.size + (tail.count - 1) * ENTRY.size)
+                    f.write(ENTRY.pack(delta, *changes))
+                    # Count last, so a concurrent reader never sees a half-written entry
+                    f.seek(block_start)
+                    f.write(struct.pack('<I', tail.count + 1))
+                    tail.count += 1
+                else:
+                    f.seek(tail.blocks * BLOCK_SIZE)
+                    f.write(HEADER.pack(1, 0, timestamp, *values) + bytes(BLOCK_SIZE - HEADER.size))
+                    tail.blocks += 1
+                    tail.count = 1
+
+            tail.timestamp = timestamp
+            tail.values = values
+            self.appended += 1
+
+    def _decode_block(self, view, offset):
+        """Columns (timestamps, followers, likes, following, videos) of one block"""
+        count, _, timestamp, *bases = HEADER.unpack_from(view, offset)
+        flat = ENTRY_RUNS[count - 1].unpack_from(view, offset + HEADER.size)
+        columns = [list(accumulate(flat[0::5], initial=timestamp))]
+        for i, base in enumerate(bases):
+            columns.append(list(accumulate(flat[i + 1::5], initial=base)))
+        return columns
+
+    def query(self, key, start=None, end=None):
+        """Samples with start <= timestamp <= end as columns
+
+        Returns {'t': [...], 'followers': [...], ...}; missing counters are None.
+        """
+        columns = {'t': []}
+        columns.update((name, []) for name in COUNTERS)
+        path = self.path(key)
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            return columns
+
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            blocks = size // BLOCK_SIZE
+            if blocks == 0:
+                return columns
+            with mmap.mmap(f.fileno(), blocks * BLOCK_SIZE, access=mmap.ACCESS_READ) as view:
+                firsts = [HEADER.unpack_from(view, i * BLOCK_SIZE)[2] for i in range(blocks)]
+                first_block = max(0, bisect_left(firsts, start) - 1) if start is not None else 0
+                last_block = bisect_right(firsts, end) if end is not None else blocks
+
+                for i in range(first_block, last_block):
+                    block = self._decode_block(view, i * BLOCK_SIZE)
+                    timestamps = block[0]
+                    lo = bisect_left(timestamps, start) if start is not None else 0
+                    hi = bisect_right(timestamps, end) if end is not None else len(timestamps)
+                    if lo >= hi:
+                        continue
+                    columns['t'].extend(timestamps[lo:hi])
+                    for name, values in zip(COUNTERS, block[1:]):
+                        values = values[lo:hi]
+                        if MISSING in values:
+                            values = [None if value == MISSING else value for value in values]
+                        columns[name].extend(values)
+        return columns
+
+    def downsample(self, columns, step, origin=0):
+        """Bucket samples into step-second buckets with min/max/last per counter"""
+        timestamps = columns['t']
+        points = []
+        lo = 0
+        while lo < len(timestamps):
+            bucket = origin + (timestamps[lo] - origin) // step * step
+            hi = bisect_left(timestamps, bucket + step, lo)
+            point = {'t': bucket, 'samples': hi - lo}
+            for name in COUNTERS:
+                values = columns[name][lo:hi]
+                if None in values:
+                    values = [value for value in values if value is not None]
+                point[name] = {'min': min(values), 'max': max(values), 'last': values[-1]} if values else None
+            points.append(point)
+            lo = hi
+        return points
+
+    def stats(self):
+        with self._lock:
+            return {'directory': self.directory, 'appended': self.appended, 'open_users': len(self._tails)}
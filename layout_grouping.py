@@ -0,0 +1,167 @@
+import re
+
+STAT_KEYWORDS = ['Followers', 'Likes', 'Following', 'Videos']
+
+# Odometer digits are rendered one per element, commas included
+DIGIT_PATTERN = re.compile(r'^[\d,]{1,2}$')
+
+
+def classify_nodes(nodes):
+    """Split (text, x, y) nodes into digit nodes and stat keyword nodes"""
+    digits = []
+    keywords = []
+    for node in nodes:
+        text = node[0]
+        if DIGIT_PATTERN.match(text):
+            digits.append(node)
+        elif text in STAT_KEYWORDS:
+            keywords.append(node)
+    return digits, keywords
+
+
+def dedupe_positions(nodes, radius):
+    """Drop nodes closer than radius (on both axes) to an already kept node
+
+    Greedy in input order, like the original pairwise loop, but kept nodes
+    are bucketed in a grid of radius-sized cells so each check only looks at
+    the 3x3 neighbourhood instead of every kept node.
+    """
+    grid = {}
+    kept = []
+    for node in nodes:
+        x, y = node[1], node[2]
+        cx, cy = int(x // radius), int(y // radius)
+        duplicate = False
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                for other in grid.get((gx, gy), ()):
+                    if abs(y - other[2]) < radius and abs(x - other[1]) < radius:
+                        duplicate = True
+                        break
+                if duplicate:
+                    break
+            if duplicate:
+                break
+        if not duplicate:
+            grid.setdefault((cx, cy), []).append(node)
+            kept.append(node)
+    return kept
+
+
+def join_digits(nodes):
+    """Concatenate digit node texts into a number string like '12,850'"""
+    number_str = ''.join(node[0] for node in nodes)
+    return re.sub(r',+', ',', number_str).strip(',')
+
+
+def parse_count(number_str):
+    """Integer value of a number string, or None if it is not a number"""
+    try:
+        return int(number_str.replace(',', ''))
+    except ValueError:
+        return None
+
+
+def group_stats_by_layout(digits, keywords, max_dy=100, max_dx=200, dedupe_radius=10):
+    """Assign digit nodes to the stat keyword below them
+
+    digits and keywords are (text, x, y) tuples. A digit belongs to a
+    keyword when it is 0..max_dy above it and within max_dx horizontally.
+    Digits in the keywords' vertical span are bucketed once into a
+    max_dx x max_dy grid, so each keyword only scans the few cells its
+    window overlaps; only those candidates are sorted (y, x, document
+    order) and deduplicated.
+    Returns {keyword.lower(): number_str}.
+    """
+    if not keywords:
+        return {}
+
+    # Only digits inside the vertical span of some keyword window can match
+    y_min = min(k[2] for k in keywords) - max_dy
+    y_max = max(k[2] for k in keywords)
+
+    grid = {}
+    for index, node in enumerate(digits):
+        y = node[2]
+        if y < y_min or y > y_max:
+            continue
+        cell = (int(node[1] // max_dx), int(y // max_dy))
+        bucket = grid.get(cell)
+        if bucket is None:
+            grid[cell] = [(y, node[1], index, node)]
+        else:
+            bucket.append((y, node[1], index, node))
+
+    stats = {}
+    for keyword, kx, ky in keywords:
+        nearby = []
+        for cx in range(int((kx - max_dx) // max_dx), int((kx + max_dx) // max_dx) + 1):
+            for cy in range(int((ky - max_dy) // max_dy), int(ky // max_dy) + 1):
+                for entry in grid.get((cx, cy), ()):
+                    if 0 <= ky - entry[0] <= max_dy and abs(kx - entry[1]) <= max_dx:
+                        nearby.append(entry)
+        if not nearby:
+            continue
+
+        nearby.sort()
+        unique = dedupe_positions([entry[3] for entry in nearby], dedupe_radius)
+        number_str = join_digits(unique)
+        value = parse_count(number_str)
+        if value is not None and value >= 0:
+            stats[keyword.lower()] = number_str
+
+    return stats
+
+
+def subtree_sizes(tree):
+    """Size of every element's subtree; tree is in document (pre-)order"""
+    sizes = [1] * len(tree)
+    for i in range(len(tree) - 1, -1, -1):
+        parent = tree[i][0]
+        if parent >= 0:
+            sizes[parent] += sizes[i]
+    return sizes
+
+
+def extract_stat_from_tree(tree, keyword, sizes=None, dedupe_radius=5):
+    """Keyword/DOM-structure extraction on a tree snapshot
+
+    Same rules as extract_stat_by_keyword: for each element whose first
+    text node contains the keyword, look for digit elements inside its
+    parent, grandparent and great-grandparent, and take the first
+    container that yields a positive number. tree holds
+    (parent, text, own_text, x, y) tuples in document order.
+    """
+    if sizes is None:
+        sizes = subtree_sizes(tree)
+
+    for i, (parent, text, own_text, x, y) in enumerate(tree):
+        if own_text is None or keyword not in own_text:
+            continue
+
+        containers = []
+        node = i
+        for _ in range(3):
+            node = tree[node][0]
+            if node < 0:
+                break
+            containers.append(node)
+        if len(containers) < 3:
+            continue
+
+        for container in containers:
+            digit_nodes = [
+                (tree[j][1], tree[j][3], tree[j][4])
+                for j in range(container + 1, container + sizes[container])
+                if tree[j][1] and DIGIT_PATTERN.match(tree[j][1])
+            ]
+            if not digit_nodes:
+                continue
+
+            digit_nodes.sort(key=lambda node: (node[2], node[1]))
+            number_str = join_digits(dedupe_positions(digit_nodes, dedupe_radius))
+            value = parse_count(number_str)
+            if value is not None and value > 0:
+                return number_str
+
+    return None
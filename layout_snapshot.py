@@ -0,0 +1,133 @@
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Collects every visible element that owns a direct text node (the same set
+# as the XPath "//*[text()]") together with its rendered text and page
+# coordinates, so the whole layout comes back in one WebDriver round trip
+# instead of two per element.
+LAYOUT_SNAPSHOT_JS = """
+var out = [];
+var sx = window.pageXOffset || 0;
+var sy = window.pageYOffset || 0;
+var els = document.getElementsByTagName('*');
+for (var i = 0; i < els.length; i++) {
+    var el = els[i];
+    var hasText = false;
+    for (var c = el.firstChild; c; c = c.nextSibling) {
+        if (c.nodeType === 3) { hasText = true; break; }
+    }
+    if (!hasText || el.getClientRects().length === 0) continue;
+    if (window.getComputedStyle(el).visibility === 'hidden') continue;
+    var text = (el.innerText || '').trim();
+    if (!text) continue;
+    var r = el.getBoundingClientRect();
+    out.push([text, Math.round(r.left + sx), Math.round(r.top + sy),
+              Math.round(r.width), Math.round(r.height)]);
+}
+return out;
+"""
+
+
+def capture_layout_snapshot(driver):
+    """Return text-bearing nodes as dicts with text, x, y, width and height
+
+    Returns None when the script cannot run so callers can fall back to the
+    per-element WebDriver path.
+    """
+    try:
+        rows = driver.execute_script(LAYOUT_SNAPSHOT_JS)
+    except Exception as e:
+        logger.warning(f"Layout snapshot script failed: {e}")
+        return None
+
+    if rows is None:
+        return None
+
+    return [
+        {'text': row[0], 'x': row[1], 'y': row[2], 'width': row[3], 'height': row[4]}
+        for row in rows
+    ]
+
+
+# Whole element tree in document order: parent index, visible text (long
+# texts truncated, they can never be a digit or a label), the first direct
+# text node (what XPath contains(text(), ...) looks at) and page position.
+TREE_SNAPSHOT_JS = """
+var out = [];
+var index = new Map();
+var sx = window.pageXOffset || 0;
+var sy = window.pageYOffset || 0;
+var els = document.getElementsByTagName('*');
+for (var i = 0; i < els.length; i++) {
+    var el = els[i];
+    index.set(el, i);
+    var parent = el.parentElement ? index.get(el.parentElement) : -1;
+    var own = null;
+    for (var c = el.firstChild; c; c = c.nextSibling) {
+        if (c.nodeType === 3) { own = c.data.slice(0, 200); break; }
+    }
+    var text = '';
+    if (el.getClientRects().length && window.getComputedStyle(el).visibility !== 'hidden') {
+        text = (el.innerText || '').trim();
+        if (text.length > 40) text = text.slice(0, 40) + '\u2026';
+    }
+    var r = el.getBoundingClientRect();
+    out.push([parent === undefined ? -1 : parent, text, own,
+              Math.round(r.left + sx), Math.round(r.top + sy)]);
+}
+return out;
+"""
+
+
+def capture_tree_snapshot(driver):
+    """Return the element tree as (parent, text, own_text, x, y) tuples, or None"""
+    try:
+        rows = driver.execute_script(TREE_SNAPSHOT_JS)
+    except Exception as e:
+        logger.warning(f"Tree snapshot script failed: {e}")
+        return None
+
+    if rows is None:
+        return None
+
+    return [tuple(row) for row in rows]
+
+
+def layout_nodes_from_tree(tree):
+    """(text, x, y) nodes equivalent to capture_layout_snapshot, from a tree snapshot"""
+    return [(text, x, y) for parent, text, own_text, x, y in tree if own_text is not None and text]
+
+
+# Markup around the stat labels (tag and class of each label element and
+# its parent). It changes when the site's layout does, not with the counts.
+LAYOUT_SIGNATURE_JS = """
+var labels = arguments[0];
+var parts = [];
+var els = document.getElementsByTagName('*');
+for (var i = 0; i < els.length; i++) {
+    var el = els[i];
+    for (var c = el.firstChild; c; c = c.nextSibling) {
+        if (c.nodeType === 3 && labels.indexOf(c.data.trim()) >= 0) {
+            var p = el.parentElement;
+            parts.push(c.data.trim() + ':' + el.tagName + '.' + el.className + '<' +
+                       (p ? p.tagName + '.' + p.className : ''));
+            break;
+        }
+    }
+}
+return parts.join('|');
+"""
+
+
+def capture_layout_signature(driver, labels):
+    """Short fingerprint of the page layout around labels, or None"""
+    try:
+        signature = driver.execute_script(LAYOUT_SIGNATURE_JS, list(labels))
+    except Exception as e:
+        logger.warning(f"Layout signature script failed: {e}")
+        return None
+    if not signature:
+        return 'no-labels'
+    return hashlib.sha1(signature.encode()).hexdigest()[:12]
@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+import logging
+
+from proc_stats import cgroup_memory_limit, children_map, driver_pid, process_tree_rss, rss_bytes
+from scrape_orchestrator import OrchestratorBusy
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+class MemoryPressure(OrchestratorBusy):
+    """Raised when memory stays near the ceiling for the whole wait (shed like a full queue)"""
+
+
+class MemoryGovernor:
+    """Keeps Chrome's memory inside the container's budget, from /proc
+
+    Every chromedriver is a child of this process, so its Chrome processes
+    are in this process's tree. A driver whose tree is above driver_limit_mb
+    when it comes back to the pool is recycled. Once the whole tree reaches
+    high_water of ceiling_mb, admit() closes idle drivers and waits up to
+    wait_timeout for in-flight scrapes to free memory, then raises
+    MemoryPressure. The ceiling defaults to the cgroup limit. Defaults come
+    from DRIVER_MEMORY_LIMIT_MB, MEMORY_CEILING_MB, MEMORY_HIGH_WATER and
+    MEMORY_WAIT_TIMEOUT. Without /proc (not Linux) it does nothing.
+    """
+
+    def __init__(self, driver_limit_mb=None, ceiling_mb=None, high_water=None, wait_timeout=None,
+                 sample_interval=1.0, pid=None):
+        self.pid = pid or os.getpid()
+        self.driver_limit = float(driver_limit_mb or os.environ.get('DRIVER_MEMORY_LIMIT_MB', 600)) * MB
+        ceiling_mb = ceiling_mb or os.environ.get('MEMORY_CEILING_MB')
+        self.ceiling = float(ceiling_mb) * MB if ceiling_mb else cgroup_memory_limit()
+        self.high_water = float(high_water or os.environ.get('MEMORY_HIGH_WATER', 0.85))
+        self.wait_timeout = float(wait_timeout or os.environ.get('MEMORY_WAIT_TIMEOUT', 30))
+        self.sample_interval = sample_interval
+        self.enabled = rss_bytes(self.pid) is not None
+        self._lock = threading.Lock()
+        self._children = None
+        self._children_at = 0.0
+        self.peak = 0
+        self.waiting = 0
+        self.recycled = 0
+        self.shed = 0
+
+    def _children_map(self):
+        # One /proc scan per sample_interval, shared by every check in between
+        now = time.monotonic()
+        with self._lock:
+            if self._children is None or now - self._children_at >= self.sample_interval:
+                self._children = children_map()
+                self._children_at = now
+            return self._children
+
+    def total_rss(self):
+        """This process plus every driver tree, in bytes (None without /proc)"""
+        if not self.enabled:
+            return None
+        total = process_tree_rss(self.pid, self._children_map())
+        if total is not None:
+            self.peak = max(self.peak, total)
+        return total
+
+    def driver_rss(self, driver):
+        pid = driver_pid(driver)
+        if not self.enabled or pid is None:
+            return None
+        return process_tree_rss(pid, self._children_map())
+
+    def should_recycle(self, driver):
+        """True (and counted) when a returned driver's tree is above the per-driver limit"""
+        rss = self.driver_rss(driver)
+        if rss is None or rss <= self.driver_limit:
+            return False
+        with self._lock:
+            self.recycled += 1
+        logger.info(f"♻️ Recycling driver at {rss / MB:.0f} MB (limit {self.driver_limit / MB:.0f} MB)")
+        return True
+
+    def under_pressure(self):
+        if self.ceiling is None:
+            return False
+        total = self.total_rss()
+        return total is not None and total >= self.ceiling * self.high_water
+
+    def admit(self, relieve=None, timeout=None):
+        """Return once memory is below the high-water mark, else raise MemoryPressure
+
+        relieve() is called while waiting to free memory (e.g. close idle drivers).
+        """
+        if not self.under_pressure():
+            return
+        deadline = time.monotonic() + (self.wait_timeout if timeout is None else timeout)
+        with self._lock:
+            self.waiting += 1
+        try:
+            logger.warning(f"🧠 Memory near ceiling ({self.total_rss() / MB:.0f} MB), holding new scrapes")
+            while True:
+                if relieve is not None:
+                    relieve()
+                if not self.under_pressure():
+                    return
+                if time.monotonic() >= deadline:
+                    with self._lock:
+                        self.shed += 1
+                    raise MemoryPressure(
+                        f"memory above {self.high_water:.0%} of {self.ceiling / MB:.0f} MB for {self.wait_timeout:.0f}s"
+                    )
+                time.sleep(self.sample_interval)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    def drivers(self):
+        """RSS of each child process tree (one per chromedriver), largest first"""
+        if not self.enabled:
+            return []
+        children = self._children_map()
+        trees = ((pid, process_tree_rss(pid, children)) for pid in children.get(self.pid, []))
+        return sorted(
+            ({'pid': pid, 'rss_mb': round(rss / MB, 1)} for pid, rss in trees if rss is not None),
+            key=lambda tree: tree['rss_mb'], reverse=True
+        )
+
+    def stats(self):
+        total = self.total_rss()
+        return {
+            'enabled': self.enabled,
+            'total_mb': round(total / MB, 1) if total is not None else None,
+            'peak_mb': round(self.peak / MB, 1),
+            'ceiling_mb': round(self.ceiling / MB, 1) if self.ceiling else None,
+            'high_water': self.high_water,
+            'driver_limit_mb': round(self.driver_limit / MB, 1),
+            'under_pressure': self.under_pressure(),
+            'drivers': self.drivers(),
+            'waiting': self.waiting,
+            'recycled': self.recycled,
+            'shed': self.shed
+        }
@@ -0,0 +1,220 @@
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tracing import span, record_span
+
+logger = logging.getLogger(__name__)
+
+# Scrape phases take from milliseconds (screenshots) to tens of seconds (settle)
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                le = ('le', _format_value(float(bound)))
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}')
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {round(values[-2], 6)}')
+            lines.append(f'{self.name}_count{label_text} {values[-1]}')
+        return lines
+
+
+class CallbackMetric:
+    """Gauge or counter read from live objects at scrape time
+
+    fn returns a number, or {label value tuple: number} when labelnames are given.
+    """
+
+    def __init__(self, name, help, kind, fn, labelnames=()):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+
+    def render(self):
+        try:
+            value = self.fn()
+        except Exception as e:
+            logger.debug(f"Metric {self.name} failed: {e}")
+            return []
+        if value is None:
+            return []
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        items = sorted(value.items()) if isinstance(value, dict) else [((), value)]
+        for labels, number in items:
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(number)}')
+        return lines
+
+
+class MetricsRegistry:
+    """Minimal Prometheus text-format registry (no client library needed)"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            # Re-registering a name (e.g. a second app instance) replaces it
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge_callback(self, name, help, fn, labelnames=()):
+        return self._register(CallbackMetric(name, help, 'gauge', fn, labelnames))
+
+    def counter_callback(self, name, help, fn, labelnames=()):
+        return self._register(CallbackMetric(name, help, 'counter', fn, labelnames))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+SCRAPE_PHASE_SECONDS = registry.histogram(
+    'tokcount_scrape_phase_seconds',
+    'Time spent per scrape phase (driver_startup, page_load, settle, layout_extraction, keyword_tree, keyword_fallback, screenshot)',
+    ['phase']
+)
+SCRAPES_TOTAL = registry.counter(
+    'tokcount_scrapes_total',
+    'Upstream scrape calls by source (http, browser) and outcome (ok, not_found, failed, timeout)',
+    ['source', 'outcome']
+)
+STAT_NOT_FOUND_TOTAL = registry.counter(
+    'tokcount_stat_not_found_total',
+    'Scrape results missing a stat, per stat',
+    ['stat']
+)
+
+
+@contextmanager
+def scrape_phase(phase, **attrs):
+    """Time one scrape phase into the histogram and, inside a trace, as a span"""
+    with span(phase, **attrs) as span_attrs, SCRAPE_PHASE_SECONDS.time(phase):
+        yield span_attrs
+
+
+def observe_phase(phase, seconds):
+    SCRAPE_PHASE_SECONDS.observe(seconds, phase)
+    record_span(phase, seconds)
+
+
+def record_scrape(source, outcome, results=()):
+    """Count one upstream call and the 'Not found' stats in its results"""
+    SCRAPES_TOTAL.inc(source, outcome)
+    for result in results:
+        for stat in ('followers', 'likes', 'following', 'videos'):
+            if result and result.get(stat) == 'Not found':
+                STAT_NOT_FOUND_TOTAL.inc(stat)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, host='0.0.0.0'):
+    """Serve /metrics from a daemon thread (for processes without Flask, e.g. workers)"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    logger.info(f"📈 Metrics on http://{host}:{port}/metrics")
+    return server
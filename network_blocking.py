@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Resource types are blocked by URL pattern; Network.setBlockedURLs only
+# matches URLs and needs no event handling on our side.
+RESOURCE_TYPE_PATTERNS = {
+    'image': ['*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.svg*', '*.ico*', '*.avif*'],
+    'font': ['*.woff*', '*.woff2*', '*.ttf*', '*.otf*', '*.eot*'],
+    'media': ['*.mp4*', '*.webm*', '*.mp3*', '*.m3u8*']
+}
+
+DEFAULT_RESOURCE_TYPES = ['image', 'font', 'media']
+
+# Ads, analytics and web fonts; the stats come from tokcount's own scripts
+DEFAULT_BLOCKED_URLS = [
+    '*googlesyndication.com*',
+    '*doubleclick.net*',
+    '*adservice.google.*',
+    '*google-analytics.com*',
+    '*googletagmanager.com*',
+    '*amazon-adsystem.com*',
+    '*facebook.net*',
+    '*hotjar.com*',
+    '*clarity.ms*',
+    '*cloudflareinsights.com*',
+    '*fonts.googleapis.com*',
+    '*fonts.gstatic.com*'
+]
+
+
+def _env_list(name):
+    value = os.environ.get(name)
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+class NetworkBlocker:
+    """DevTools URL blocklist for a Chrome driver plus per-page traffic counters
+
+    Configured from BLOCKED_URL_PATTERNS / BLOCKED_RESOURCE_TYPES
+    (comma-separated) when not given explicitly; NETWORK_BLOCKING=0 turns
+    blocking off but keeps the counters.
+    """
+
+    def __init__(self, url_patterns=None, resource_types=None, enabled=None):
+        if enabled is None:
+            enabled = os.environ.get('NETWORK_BLOCKING', '1') != '0'
+        if url_patterns is None:
+            url_patterns = _env_list('BLOCKED_URL_PATTERNS')
+        if resource_types is None:
+            resource_types = _env_list('BLOCKED_RESOURCE_TYPES')
+
+        self.enabled = enabled
+        self.resource_types = DEFAULT_RESOURCE_TYPES if resource_types is None else resource_types
+        self.url_patterns = list(DEFAULT_BLOCKED_URLS if url_patterns is None else url_patterns)
+        for resource_type in self.resource_types:
+            self.url_patterns.extend(RESOURCE_TYPE_PATTERNS.get(resource_type, []))
+
+        self._lock = threading.Lock()
+        self.totals = {'pages': 0, 'requests': 0, 'blocked_requests': 0, 'bytes_loaded': 0}
+
+    def configure_options(self, options):
+        """Chrome options needed before launch: performance log for the counters"""
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        if self.enabled and 'image' in self.resource_types:
+            # The working replacement for the ignored --disable-images flag
+            options.add_argument('--blink-settings=imagesEnabled=false')
+
+    def apply(self, driver):
+        """Install the blocklist on a freshly launched driver or its current (new) tab"""
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            if self.enabled:
+                driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.url_patterns})
+                logger.info(f"🚫 Blocking {len(self.url_patterns)} URL patterns")
+            return True
+        except Exception as e:
+            logger.warning(f"Could not install network blocklist: {e}")
+            return False
+
+    def collect(self, driver):
+        """Drain the performance log and count traffic since the last call"""
+        counters = {'requests': 0, 'blocked_requests': 0, 'bytes_loaded': 0}
+        try:
+            entries = driver.get_log('performance')
+        except Exception as e:
+            logger.debug(f"Performance log unavailable: {e}")
+            return counters
+
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            method = message.get('method')
+            params = message.get('params', {})
+            if method == 'Network.requestWillBeSent':
+                counters['requests'] += 1
+            elif method == 'Network.loadingFinished':
+                counters['bytes_loaded'] += int(params.get('encodedDataLength', 0))
+            elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+                counters['blocked_requests'] += 1
+
+        with self._lock:
+            self.totals['pages'] += 1
+            for key, value in counters.items():
+                self.totals[key] += value
+        return counters
+
+    def stats(self):
+        with self._lock:
+            return dict(self.totals, enabled=self.enabled, patterns=len(self.url_patterns))
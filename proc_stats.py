@@ -0,0 +1,80 @@
+import os
+
+# Linux-only: everything here reads /proc and returns None elsewhere
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def rss_bytes(pid):
+    """Resident set size of one process, or None if it is gone or /proc is unavailable"""
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def children_map():
+    """{parent pid: [child pids]} for every process in /proc"""
+    children = {}
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return children
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces/parens; fields resume after the last ')'
+        fields = stat[stat.rfind(')') + 2:].split()
+        if len(fields) > 1:
+            children.setdefault(int(fields[1]), []).append(int(entry))
+    return children
+
+
+def descendants(pid, children=None):
+    children = children if children is not None else children_map()
+    found = []
+    stack = [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            found.append(child)
+            stack.append(child)
+    return found
+
+
+def process_tree_rss(pid, children=None):
+    """RSS of pid plus all its descendants (e.g. chromedriver and its Chrome processes)"""
+    total = rss_bytes(pid)
+    if total is None:
+        return None
+    for child in descendants(pid, children):
+        total += rss_bytes(child) or 0
+    return total
+
+
+def driver_pid(driver):
+    """chromedriver's pid for a Selenium Chrome driver, or None"""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+def cgroup_memory_limit():
+    """Container memory limit in bytes (cgroup v2, then v1), or None when unlimited"""
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # v1 reports "unlimited" as a huge page-aligned number
+        if value != 'max' and value.isdigit() and int(value) < 1 << 60:
+            return int(value)
+        return None
+    return None
@@ -0,0 +1,276 @@
+import heapq
+import json
+import math
+import os
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from result_cache import normalize_username
+
+logger = logging.getLogger(__name__)
+
+# Read counts used for priority halve every hour
+POPULARITY_HALF_LIFE = 3600
+
+
+class WatchEntry:
+    """A tracked account and its refresh bookkeeping"""
+
+    def __init__(self, username, interval):
+        self.username = username
+        self.interval = interval
+        self.next_due = 0.0
+        self.last_refreshed = None
+        self.reads = 0.0
+        self.reads_at = time.time()
+        self.refreshes = 0
+        self.failures = 0
+
+    def popularity(self, now):
+        return self.reads * 0.5 ** ((now - self.reads_at) / POPULARITY_HALF_LIFE)
+
+    def to_dict(self, now):
+        return {
+            'username': self.username,
+            'interval': self.interval,
+            'last_refreshed': (
+                time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.last_refreshed))
+                if self.last_refreshed else None
+            ),
+            'next_refresh_in': round(max(0.0, self.next_due - now), 1),
+            'reads': round(self.popularity(now), 2),
+            'refreshes': self.refreshes,
+            'failures': self.failures
+        }
+
+
+class RefreshScheduler:
+    """Keeps a watchlist of accounts fresh by scraping them ahead of readers
+
+    A heap ordered by due time holds every tracked account. Once accounts
+    are due they are ranked by how overdue they are (in intervals) plus
+    their decayed read count. A token bucket of budget_per_minute
+    refreshes caps the scraping the scheduler may do. refresh(username)
+    must scrape and store the result through the normal read path and
+    return True on success. Refreshes run on up to concurrency threads
+    (the orchestrator and governor still bound the actual scraping) and
+    are recorded as each one finishes. The watchlist is persisted to path
+    as JSON. Defaults come from WATCHLIST_FILE, WATCHLIST_INTERVAL,
+    WATCHLIST_BUDGET_PER_MINUTE, WATCHLIST_CONCURRENCY (default: the
+    per-minute budget) and WATCHLIST (comma-separated usernames).
+    """
+
+    def __init__(self, refresh, path=None, default_interval=None, budget_per_minute=None, min_interval=60,
+                 concurrency=None):
+        self.refresh = refresh
+        self.path = path or os.environ.get('WATCHLIST_FILE', 'watchlist.json')
+        self.default_interval = float(default_interval or os.environ.get('WATCHLIST_INTERVAL', 240))
+        self.budget_per_minute = float(budget_per_minute or os.environ.get('WATCHLIST_BUDGET_PER_MINUTE', 20))
+        self.min_interval = min_interval
+        self.concurrency = int(
+            concurrency or os.environ.get('WATCHLIST_CONCURRENCY', max(1, int(self.budget_per_minute)))
+        )
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='watchlist')
+        self._inflight = set()
+        self._entries = {}
+        self._heap = []  # (next_due, seq, key); stale items are skipped lazily
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._tokens = self.budget_per_minute
+        self._tokens_at = time.monotonic()
+        self.skipped_for_budget = 0
+        self.load()
+
+    def ttl_for(self, key):
+        """Cache TTL for a tracked account, so it stays fresh between refreshes
+
+        Covers the interval plus one late or failed attempt; None when untracked.
+        """
+        entry = self._entries.get(key)
+        return entry.interval * 2 if entry else None
+
+    def is_tracked(self, key):
+        return key in self._entries
+
+    def _push(self, key, entry):
+        self._seq += 1
+        heapq.heappush(self._heap, (entry.next_due, self._seq, key))
+
+    def add(self, username, interval=None, save=True):
+        """Track username (or change its interval); it is refreshed right away"""
+        interval = max(float(interval or self.default_interval), self.min_interval)
+        key = normalize_username(username)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = WatchEntry(username.strip().lstrip('@'), interval)
+            else:
+                entry.interval = interval
+                entry.next_due = min(entry.next_due, time.time() + interval)
+            self._push(key, entry)
+        if save:
+            self.save()
+        self._wake.set()
+        return entry
+
+    def remove(self, username):
+        with self._lock:
+            removed = self._entries.pop(normalize_username(username), None)
+        if removed:
+            self.save()
+        return removed is not None
+
+    def record_read(self, key):
+        """Count an API read; popular accounts are refreshed first when several are due"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        with self._lock:
+            now = time.time()
+            entry.reads = entry.popularity(now) + 1
+            entry.reads_at = now
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                watchlist = json.load(f)
+        except (OSError, ValueError):
+            watchlist = {}
+        for username in os.environ.get('WATCHLIST', '').split(','):
+            if username.strip() and normalize_username(username) not in watchlist:
+                watchlist[username.strip()] = None
+        for username, interval in watchlist.items():
+            self.add(username, interval, save=False)
+
+    def save(self):
+        with self._lock:
+            watchlist = {entry.username: entry.interval for entry in self._entries.values()}
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(watchlist, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write watchlist {self.path}: {e}")
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.budget_per_minute,
+            self._tokens + (now - self._tokens_at) * self.budget_per_minute / 60
+        )
+        self._tokens_at = now
+
+    def priority(self, entry, now):
+        overdue = (now - entry.next_due) / entry.interval
+        return overdue + math.log1p(entry.popularity(now))
+
+    def next_batch(self):
+        """Due entries the budget allows, best first, and seconds until the next check"""
+        now = time.time()
+        with self._lock:
+            due = {}
+            while self._heap and self._heap[0][0] <= now:
+                next_due, _, key = heapq.heappop(self._heap)
+                entry = self._entries.get(key)
+                # Entries being refreshed are pushed again when they finish
+                if entry is not None and entry.next_due == next_due and key not in self._inflight:
+                    due[key] = entry
+            due = list(due.values())
+
+            self._refill()
+            due.sort(key=lambda entry: self.priority(entry, now), reverse=True)
+            allowed = min(len(due), int(self._tokens))
+            self._tokens -= allowed
+            batch, deferred = due[:allowed], due[allowed:]
+            for entry in deferred:
+                self._push(normalize_username(entry.username), entry)
+            self.skipped_for_budget += len(deferred)
+
+            if deferred:
+                wait = (1 - self._tokens) * 60 / self.budget_per_minute
+            elif self._heap:
+                wait = self._heap[0][0] - now
+            else:
+                wait = 60
+        return batch, max(0.05, wait)
+
+    def _refresh(self, entry):
+        start = time.time()
+        try:
+            ok = self.refresh(entry.username)
+        except Exception as e:
+            logger.warning(f"Watchlist refresh failed for {entry.username}: {e}")
+            ok = False
+
+        key = normalize_username(entry.username)
+        with self._lock:
+            self._inflight.discard(key)
+            current = self._entries.get(key)
+            if current is not entry:
+                # Removed meanwhile; if re-added, next_batch dropped the new entry's
+                # heap item while this one was in flight, so schedule it now
+                if current is not None:
+                    self._push(key, current)
+                    self._wake.set()
+                return ok
+            if ok:
+                entry.refreshes += 1
+                entry.failures = 0
+                entry.last_refreshed = time.time()
+                entry.next_due = start + entry.interval
+            else:
+                entry.failures += 1
+                entry.next_due = time.time() + min(entry.interval, 30 * 2 ** entry.failures)
+            self._push(key, entry)
+        # The loop may be sleeping on a wait computed before this entry came back
+        self._wake.set()
+        return ok
+
+    def run_once(self):
+        """Start refreshes for the due entries the budget allows; returns seconds to wait"""
+        batch, wait = self.next_batch()
+        for entry in batch:
+            with self._lock:
+                self._inflight.add(normalize_username(entry.username))
+            self._executor.submit(self._refresh, entry)
+        return wait
+
+    def _loop(self):
+        while True:
+            wait = self.run_once()
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='watchlist-refresh', daemon=True)
+            self._thread.start()
+            logger.info(f"🗓️ Watchlist scheduler started for {len(self._entries)} account(s)")
+
+    def entries(self):
+        now = time.time()
+        with self._lock:
+            return [entry.to_dict(now) for entry in self._entries.values()]
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+
+    def stats(self):
+        with self._lock:
+            now = time.time()
+            return {
+                'tracked': len(self._entries),
+                'due': sum(1 for entry in self._entries.values() if entry.next_due <= now),
+                'budget_per_minute': self.budget_per_minute,
+                'tokens': round(self._tokens, 2),
+                'skipped_for_budget': self.skipped_for_budget,
+                'in_flight': len(self._inflight),
+                'concurrency': self.concurrency,
+                'running': self._thread is not None
+            }
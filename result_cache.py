@@ -0,0 +1,137 @@
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_username(username):
+    """Cache/dedup key for a username: trimmed, without '@', lowercase"""
+    return username.strip().lstrip('@').lower()
+
+
+class ResultCache:
+    """In-process LRU cache of scrape results with TTL and stale-while-revalidate
+
+    Entries younger than ttl (or their own ttl given to set) are fresh.
+    Entries up to ttl + stale_grace old are served as stale while a
+    background refresh replaces them. Pinned keys are never evicted.
+    """
+
+    def __init__(self, ttl=300, max_size=1000, stale_grace=600):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.stale_grace = stale_grace
+        self._entries = OrderedDict()  # key -> (stored_at, value, ttl)
+        self._refreshing = set()
+        self._pinned = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def set(self, key, value, stored_at=None, ttl=None):
+        with self._lock:
+            self._entries[key] = (stored_at or time.time(), value, ttl or self.ttl)
+            self._entries.move_to_end(key)
+            self._evict()
+    
+    def _evict(self):
+        skipped = 0
+        while len(self._entries) > self.max_size and skipped < len(self._entries):
+            key = next(iter(self._entries))
+            if key in self._pinned:
+                self._entries.move_to_end(key)
+                skipped += 1
+            else:
+                self._entries.popitem(last=False)
+    
+    def pin(self, key):
+        """Keep key's entry through LRU eviction"""
+        with self._lock:
+            self._pinned.add(key)
+    
+    def unpin(self, key):
+        with self._lock:
+            self._pinned.discard(key)
+
+    def get(self, key):
+        """Return (value, age_seconds) or (None, None) without touching counters"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None, None
+        stored_at, value, _ = entry
+        return value, time.time() - stored_at
+
+    def lookup(self, key, max_age=None):
+        """Return (value, age_seconds, state) where state is fresh, stale or miss
+
+        max_age lets a client demand a younger value; anything older is a
+        miss, so it is never served stale either.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, None, 'miss'
+
+            stored_at, value, ttl = entry
+            age = time.time() - stored_at
+            limit = ttl if max_age is None else min(ttl, max_age)
+
+            if age <= limit:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value, age, 'fresh'
+
+            if max_age is None and age <= ttl + self.stale_grace:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                return value, age, 'stale'
+
+            self.misses += 1
+            return None, None, 'miss'
+
+    def refresh_in_background(self, key, fetch, is_cacheable=lambda value: True, ttl=None, store=None):
+        """Run fetch() on a daemon thread and store its result; one refresh per key
+
+        store(value), when given, saves a cacheable result instead of set(),
+        for callers that record more than the cache entry.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                value = fetch()
+                if value is not None and is_cacheable(value):
+                    if store is not None:
+                        store(value)
+                    else:
+                        self.set(key, value, ttl=ttl)
+            except Exception as e:
+                logger.warning(f"Background refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f"cache-refresh-{key}", daemon=True).start()
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'stale_grace': self.stale_grace,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'refreshing': len(self._refreshing),
+                'pinned': len(self._pinned)
+            }
@@ -0,0 +1,115 @@
+import asyncio
+import contextvars
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class OrchestratorBusy(Exception):
+    """Raised when too many scrapes are already waiting for a slot"""
+
+
+class ScrapeOrchestrator:
+    """Single owner of all blocking scrape work
+
+    An asyncio loop on a background thread schedules every scrape. Blocking
+    Selenium/HTTP work runs on a bounded executor, and one semaphore in the
+    loop enforces the concurrency limit, so callers waiting for a slot cost
+    a future, not a thread. Calls with the same key while one is in flight
+    are coalesced onto it (single-flight).
+    """
+
+    def __init__(self, max_concurrency=2, max_queue=1000):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='scrape')
+        self.loop = asyncio.new_event_loop()
+        self._semaphore = None
+        self._inflight = {}
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.leaders = 0
+        self.coalesced = 0
+        self._thread = threading.Thread(target=self._run_loop, name='scrape-orchestrator', daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.loop.run_forever()
+
+    async def _execute(self, context, fn, args):
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise OrchestratorBusy(f"{self.waiting} scrapes already queued")
+
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        try:
+            return await self.loop.run_in_executor(self.executor, context.run, fn, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    async def _dispatch(self, key, context, fn, args):
+        """Runs in the loop; returns (result, shared)"""
+        if key is None:
+            return await self._execute(context, fn, args), False
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            # shield: one caller giving up must not cancel the others
+            return await asyncio.shield(task), True
+
+        self.leaders += 1
+        task = self.loop.create_task(self._execute(context, fn, args))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task), False
+
+    def submit(self, key, fn, *args):
+        """Schedule fn(*args); returns a concurrent.futures.Future of (result, shared)
+
+        key=None disables coalescing. The caller's contextvars travel with
+        the call into the executor thread.
+        """
+        context = contextvars.copy_context()
+        return asyncio.run_coroutine_threadsafe(self._dispatch(key, context, fn, args), self.loop)
+
+    async def run(self, key, fn, *args):
+        """Await a scrape from any event loop (e.g. an async Flask view)"""
+        return await asyncio.wrap_future(self.submit(key, fn, *args))
+
+    def run_sync(self, key, fn, *args, timeout=None):
+        """Blocking variant for plain threads (batch jobs, background refresh)"""
+        return self.submit(key, fn, *args).result(timeout)
+
+    def stats(self):
+        return {
+            'max_concurrency': self.max_concurrency,
+            'max_queue': self.max_queue,
+            'running': self.running,
+            'waiting': self.waiting,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'coalescing': {
+                'in_flight': len(self._inflight),
+                'leaders': self.leaders,
+                'coalesced': self.coalesced
+            }
+        }
+
+    def shutdown(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Scrape worker: leases tasks from the shared work queue and runs them on
+local Chrome drivers. Start as many as needed next to the API process; the
+API nodes only enqueue and wait. The only backend is SQLite, so workers
+must share the API's host and filesystem (not a separate dyno or
+container) until a networked backend is added to work_queue.BACKENDS.
+
+    WORK_QUEUE_URL=sqlite:///var/tikscr/queue.db python scrape_worker.py --slots 2
+"""
+
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+import logging
+
+from tokcount_scraper_railway import TokCountScraperRailway
+from driver_pool import ScraperPool, PoolTimeout
+from memory_governor import MemoryGovernor, MemoryPressure
+from network_blocking import NetworkBlocker
+from fast_path import FastPathScraper
+from debug_artifacts import ArtifactRecorder
+from work_queue import open_queue
+import metrics
+import tracing
+from upstream_governor import UpstreamGovernor, GovernorTimeout, fast_path_outcome, browser_latency
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TASK_KINDS = ['scrape_user']
+
+
+class ScrapeWorker:
+    """Lease -> scrape -> ack loop over a WorkQueue, one thread per slot
+
+    Leases of running tasks are extended by a heartbeat thread, so a
+    slow scrape keeps its task while a crashed worker's tasks become
+    visible to other workers after visibility_timeout.
+    """
+
+    def __init__(self, work_queue, fetch, worker_id=None, slots=2, visibility_timeout=60,
+                 poll_interval=1.0, retry_delay=5, purge_after=3600):
+        self.queue = work_queue
+        self.fetch = fetch
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.slots = slots
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.purge_after = purge_after
+        self._stop = threading.Event()
+        self._active = {}
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+
+    def handle(self, task):
+        username = task.payload['username']
+        logger.info(f"🎯 [{self.worker_id}] {username} (task {task.id}, attempt {task.attempts})")
+        with self._lock:
+            self._active[task.id] = task
+        try:
+            # Spans share the API request's trace id, in this worker's TRACE_FILE
+            with tracing.trace('scrape_task', trace_id=task.payload.get('trace_id'),
+                               profile=task.payload.get('profile', False), task_id=task.id):
+                result = self.fetch(username)
+        except Exception as e:
+            if isinstance(e, (PoolTimeout, GovernorTimeout, MemoryPressure)):
+                # Not the task's fault: hand it back without using up an attempt, after
+                # a pause so this worker does not re-lease it straight away while overloaded
+                logger.info(f"⏳ [{self.worker_id}] Out of capacity for {username}, requeueing: {e}")
+                self.queue.release(task, delay=self.retry_delay)
+                return
+            logger.error(f"Task {task.id} for {username} failed: {e}")
+            self.queue.fail(task, e, retry=True, delay=self.retry_delay)
+            with self._lock:
+                self.failed += 1
+            return
+        finally:
+            with self._lock:
+                self._active.pop(task.id, None)
+
+        self.queue.ack(task, result)
+        with self._lock:
+            self.completed += 1
+
+    def _slot_loop(self):
+        while not self._stop.is_set():
+            try:
+                task = self.queue.lease(self.worker_id, TASK_KINDS, self.visibility_timeout)
+            except Exception as e:
+                logger.warning(f"Lease failed: {e}")
+                task = None
+            if task is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self.handle(task)
+
+    def _heartbeat_loop(self):
+        last_purge = 0
+        while not self._stop.wait(self.visibility_timeout / 3):
+            with self._lock:
+                active = list(self._active.values())
+            for task in active:
+                try:
+                    self.queue.extend(task, self.visibility_timeout)
+                except Exception as e:
+                    logger.warning(f"Could not extend lease on {task.id}: {e}")
+            if time.monotonic() - last_purge > self.purge_after:
+                last_purge = time.monotonic()
+                try:
+                    self.queue.purge(self.purge_after)
+                except Exception as e:
+                    logger.warning(f"Purge failed: {e}")
+
+    def run(self):
+        """Serve until stop() is called; running tasks are finished first"""
+        threads = [threading.Thread(target=self._heartbeat_loop, name='lease-heartbeat', daemon=True)]
+        threads += [
+            threading.Thread(target=self._slot_loop, name=f'worker-slot-{i}', daemon=True)
+            for i in range(self.slots)
+        ]
+        for thread in threads:
+            thread.start()
+        logger.info(f"👷 Worker {self.worker_id} serving {self.slots} slot(s)")
+        for thread in threads[1:]:
+            while thread.is_alive():
+                thread.join(1)
+        self._stop.set()
+
+    def stop(self, *_):
+        logger.info("🛑 Stopping after the current tasks...")
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queue', default=os.environ.get('WORK_QUEUE_URL'),
+                        help='work queue URL (default WORK_QUEUE_URL)')
+    parser.add_argument('--slots', type=int, default=int(os.environ.get('SCRAPER_POOL_SIZE', 2)),
+                        help='Chrome drivers / concurrent tasks on this worker')
+    parser.add_argument('--visibility-timeout', type=float,
+                        default=float(os.environ.get('WORK_QUEUE_VISIBILITY', 60)))
+    parser.add_argument('--id', help='worker id (default host-pid)')
+    parser.add_argument('--metrics-port', type=int,
+                        default=int(os.environ['WORKER_METRICS_PORT']) if os.environ.get('WORKER_METRICS_PORT') else None,
+                        help='serve Prometheus /metrics on this port')
+    args = parser.parse_args()
+
+    if not args.queue:
+        parser.error('--queue or WORK_QUEUE_URL is required')
+
+    work_queue = open_queue(args.queue, visibility_timeout=args.visibility_timeout)
+    fast_path = FastPathScraper(timeout=float(os.environ.get('FAST_PATH_TIMEOUT', 5)))
+    # Per worker; each worker backs off on its own view of upstream health
+    governor = UpstreamGovernor(
+        max_concurrency=int(os.environ.get('GOVERNOR_MAX_CONCURRENCY', args.slots)),
+        wait_timeout=float(os.environ.get('SCRAPER_QUEUE_TIMEOUT', 60))
+    )
+    network_blocker = NetworkBlocker()
+    artifacts = ArtifactRecorder()
+    memory = MemoryGovernor()
+    pool = ScraperPool(
+        lambda: TokCountScraperRailway(
+            headless=True,
+            settle_quiet_window=float(os.environ.get('SETTLE_QUIET_WINDOW', 2.0)),
+            settle_timeout=float(os.environ.get('SETTLE_TIMEOUT', 12)),
+            network_blocker=network_blocker,
+            artifact_recorder=artifacts
+        ),
+        size=args.slots,
+        max_pages=int(os.environ.get('SCRAPER_MAX_PAGES', 50)),
+        wait_timeout=float(os.environ.get('SCRAPER_QUEUE_TIMEOUT', 60)),
+        memory=memory
+    )
+
+    def fetch(username):
+        """Same raw result the API's fetch_user_data produces"""
+        if fast_path.enabled:
+            result = governor.call('http', fast_path.scrape_user_data, username, outcome=fast_path_outcome)
+            if result:
+                return dict(result, source='http')
+        # Upstream slot first, so a GovernorTimeout never holds or breaks a driver
+        with governor.reserve() as call:
+            with pool.scraper() as scraper:
+                result = call('browser', scraper.scrape_user_data, username, latency=browser_latency)
+        return dict(result, source='browser') if result else result
+
+    worker = ScrapeWorker(work_queue, fetch, worker_id=args.id, slots=args.slots,
+                          visibility_timeout=args.visibility_timeout)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+
+    if args.metrics_port:
+        metrics.registry.counter_callback(
+            'tokcount_driver_recycles_total', 'Pooled Chrome drivers replaced after max_pages or a failed health check',
+            lambda: pool.recycled
+        )
+        metrics.registry.gauge_callback(
+            'tokcount_queue_depth', 'Requests or tasks waiting per stage',
+            lambda: {('driver_pool',): pool.waiting, ('governor',): governor.waiting}, ['queue']
+        )
+        metrics.registry.gauge_callback(
+            'tokcount_memory_bytes', 'RSS of this process and its Chrome drivers, and the ceiling it is held under',
+            lambda: {('total',): memory.total_rss(), ('ceiling',): memory.ceiling or 0} if memory.enabled else None,
+            ['scope']
+        )
+        metrics.registry.counter_callback(
+            'tokcount_memory_actions_total', 'Drivers recycled over the per-driver limit and scrapes shed near the ceiling',
+            lambda: {('recycled',): memory.recycled, ('shed',): memory.shed}, ['action']
+        )
+        metrics.registry.counter_callback(
+            'tokcount_worker_tasks_total', 'Queue tasks finished by this worker',
+            lambda: {('completed',): worker.completed, ('failed',): worker.failed}, ['result']
+        )
+        metrics.start_http_server(args.metrics_port)
+    
+    print(f"🔥 Pre-launching {pool.size} Chrome driver(s)...")
+    pool.warm()
+    try:
+        worker.run()
+    finally:
+        pool.close_all()
+
+
+if __name__ == '__main__':
+    main()
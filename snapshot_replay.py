@@ -0,0 +1,191 @@
+"""
+Record tokcount page snapshots and replay the extraction logic offline
+
+    python snapshot_replay.py record rafiedotid khaby.lame
+    python snapshot_replay.py replay
+    python snapshot_replay.py bench --repeat 20
+
+A snapshot is <dir>/<name>.json holding the element tree (text, first text
+node, page position, parent) plus the stats the live scraper extracted
+('expected', editable by hand), and <dir>/<name>.html with the raw HTML.
+Replay runs the visual-layout and keyword extraction on the tree without
+Selenium.
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+
+from layout_snapshot import capture_tree_snapshot, layout_nodes_from_tree
+from layout_grouping import (
+    STAT_KEYWORDS, classify_nodes, extract_stat_from_tree, group_stats_by_layout,
+    subtree_sizes
+)
+
+DEFAULT_DIR = os.path.join('fixtures', 'snapshots')
+
+
+def record_snapshot(driver, username, fixtures_dir=DEFAULT_DIR, expected=None):
+    """Save the current page's element tree and HTML; returns the JSON path"""
+    tree = capture_tree_snapshot(driver)
+    if tree is None:
+        raise RuntimeError("Could not capture tree snapshot")
+
+    os.makedirs(fixtures_dir, exist_ok=True)
+    name = f"{username}_{time.strftime('%Y%m%d_%H%M%S')}"
+    html_path = os.path.join(fixtures_dir, f"{name}.html")
+    json_path = os.path.join(fixtures_dir, f"{name}.json")
+
+    with open(html_path, 'w', encoding='utf-8') as f:
+        f.write(driver.page_source)
+
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'username': username,
+            'url': driver.current_url,
+            'captured_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'expected': expected or {},
+            'html': os.path.basename(html_path),
+            'tree': tree
+        }, f)
+
+    return json_path
+
+
+def load_snapshot(path):
+    with open(path, encoding='utf-8') as f:
+        snapshot = json.load(f)
+    snapshot['tree'] = [tuple(row) for row in snapshot['tree']]
+    return snapshot
+
+
+def list_snapshots(fixtures_dir=DEFAULT_DIR):
+    return sorted(glob.glob(os.path.join(fixtures_dir, '*.json')))
+
+
+def replay_visual_layout(tree):
+    """extract_stats_by_visual_layout on a tree snapshot"""
+    digits, keywords = classify_nodes(layout_nodes_from_tree(tree))
+    return group_stats_by_layout(digits, keywords)
+
+
+def replay_keyword(tree, sizes=None):
+    """extract_stat_by_keyword for every stat on a tree snapshot"""
+    sizes = sizes or subtree_sizes(tree)
+    stats = {}
+    for keyword in STAT_KEYWORDS:
+        value = extract_stat_from_tree(tree, keyword, sizes)
+        if value:
+            stats[keyword.lower()] = value
+    return stats
+
+
+def replay(tree):
+    """Full scrape_user_data extraction: visual layout, keyword fallback for gaps"""
+    stats = replay_visual_layout(tree)
+    missing = [k for k in STAT_KEYWORDS if k.lower() not in stats]
+    if missing:
+        sizes = subtree_sizes(tree)
+        for keyword in missing:
+            value = extract_stat_from_tree(tree, keyword, sizes)
+            if value:
+                stats[keyword.lower()] = value
+    return stats
+
+
+def accuracy(stats, expected):
+    """(matching stats, stats with an expected value)"""
+    keys = [key for key in expected if key in ('followers', 'likes', 'following', 'videos')]
+    return sum(1 for key in keys if stats.get(key) == expected[key]), len(keys)
+
+
+def timed(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def cmd_record(args):
+    from tokcount_scraper_railway import TokCountScraperRailway
+
+    scraper = TokCountScraperRailway(headless=not args.show)
+    try:
+        for username in args.usernames:
+            result = scraper.scrape_user_data(username)
+            if not result:
+                print(f"❌ {username}: scrape failed, nothing recorded")
+                continue
+            expected = {k: v for k, v in result.items() if k in ('followers', 'likes', 'following', 'videos') and v != 'Not found'}
+            path = record_snapshot(scraper.driver, username, args.dir, expected)
+            print(f"💾 {username}: {path}")
+    finally:
+        scraper.close_driver()
+
+
+def cmd_replay(args):
+    for path in list_snapshots(args.dir):
+        snapshot = load_snapshot(path)
+        stats = replay(snapshot['tree'])
+        ok, total = accuracy(stats, snapshot.get('expected', {}))
+        print(f"{os.path.basename(path)}: {stats} ({ok}/{total} match expected)")
+
+
+def cmd_bench(args):
+    paths = list_snapshots(args.dir)
+    if not paths:
+        print(f"No snapshots in {args.dir}")
+        return
+
+    print(f"{'snapshot':<40} {'nodes':>7} {'layout ms':>10} {'keyword ms':>11} {'full ms':>8}  accuracy")
+    totals = {'layout': 0.0, 'keyword': 0.0, 'full': 0.0, 'ok': 0, 'total': 0}
+    for path in paths:
+        snapshot = load_snapshot(path)
+        tree = snapshot['tree']
+        layout_time, _ = timed(lambda: replay_visual_layout(tree), args.repeat)
+        keyword_time, _ = timed(lambda: replay_keyword(tree), args.repeat)
+        full_time, stats = timed(lambda: replay(tree), args.repeat)
+        ok, total = accuracy(stats, snapshot.get('expected', {}))
+
+        totals['layout'] += layout_time
+        totals['keyword'] += keyword_time
+        totals['full'] += full_time
+        totals['ok'] += ok
+        totals['total'] += total
+        print(f"{os.path.basename(path)[:40]:<40} {len(tree):>7} {layout_time * 1000:>10.2f} "
+              f"{keyword_time * 1000:>11.2f} {full_time * 1000:>8.2f}  {ok}/{total}")
+
+    pct = 100.0 * totals['ok'] / totals['total'] if totals['total'] else 0.0
+    print(f"{'TOTAL (' + str(len(paths)) + ' snapshots)':<40} {'':>7} {totals['layout'] * 1000:>10.2f} "
+          f"{totals['keyword'] * 1000:>11.2f} {totals['full'] * 1000:>8.2f}  "
+          f"{totals['ok']}/{totals['total']} ({pct:.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dir', default=DEFAULT_DIR, help='fixtures directory')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    record = sub.add_parser('record', help='scrape live tokcount.com and save snapshots')
+    record.add_argument('usernames', nargs='+')
+    record.add_argument('--show', action='store_true', help='run Chrome with a window')
+    record.set_defaults(func=cmd_record)
+
+    replay_cmd = sub.add_parser('replay', help='run extraction on every snapshot')
+    replay_cmd.set_defaults(func=cmd_replay)
+
+    bench = sub.add_parser('bench', help='time extraction and report accuracy')
+    bench.add_argument('--repeat', type=int, default=10)
+    bench.set_defaults(func=cmd_bench)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
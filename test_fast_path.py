@@ -0,0 +1,59 @@
+"""
+FastPathScraper against the local tokcount stand-in
+
+    python -m pytest -q test_fast_path.py
+"""
+
+import threading
+
+import pytest
+
+from fast_path import FastPathScraper
+from tokcount_standin import fake_counts, make_server
+
+
+@pytest.fixture
+def standin():
+    server = make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_parses_counts_from_stats_url_env(standin, monkeypatch):
+    monkeypatch.setenv('TOKCOUNT_STATS_URL', standin + '/stats/{username}')
+    scraper = FastPathScraper()
+    assert scraper.enabled
+
+    result = scraper.scrape_user_data('rafiedotid')
+
+    counts = fake_counts('rafiedotid')
+    assert result['username'] == 'rafiedotid'
+    assert result['followers'] == f"{counts['followerCount']:,}"
+    assert result['likes'] == f"{counts['heartCount']:,}"
+    assert result['following'] == f"{counts['followingCount']:,}"
+    assert result['videos'] == f"{counts['videoCount']:,}"
+    assert scraper.stats() == {'enabled': True, 'hits': 1, 'misses': 0}
+
+
+def test_missing_user_is_a_miss(standin):
+    scraper = FastPathScraper(stats_url=standin + '/stats/{username}')
+
+    assert scraper.scrape_user_data('missinguser') is None
+    assert scraper.stats()['misses'] == 1
+
+
+def test_slow_response_times_out(standin):
+    scraper = FastPathScraper(stats_url=standin + '/stats/{username}?delay=1000', timeout=0.2)
+
+    assert scraper.scrape_user_data('rafiedotid') is None
+    assert scraper.stats()['misses'] == 1
+
+
+def test_disabled_without_stats_url(monkeypatch):
+    monkeypatch.delenv('TOKCOUNT_STATS_URL', raising=False)
+    scraper = FastPathScraper()
+
+    assert not scraper.enabled
+    assert scraper.scrape_user_data('rafiedotid') is None
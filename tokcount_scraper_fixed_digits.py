@@ -1,16 +1,39 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 import time
 import json
-import re
+import os
+
+from layout_snapshot import capture_layout_snapshot
+from layout_grouping import (
+    DIGIT_PATTERN, classify_nodes, dedupe_positions, group_stats_by_layout,
+    join_digits, parse_count
+)
+from network_blocking import NetworkBlocker
+from driver_discovery import default_discovery
+from debug_artifacts import ArtifactRecorder
+from animation_settle import wait_for_stats_settle
+from extraction_cascade import default_cascade
+from metrics import scrape_phase, observe_phase
+from tracing import span
 
 class TokCountFixedDigits:
-    def __init__(self, headless=False):
+    def __init__(self, headless=False, layout_capture='script', settle_quiet_window=2.0, settle_timeout=12,
+                 network_blocker=None, artifact_recorder=None, base_url=None, extraction_cascade=None):
+        # Page the user is appended to; TOKCOUNT_BASE_URL points it at a stand-in
+        self.base_url = base_url or os.environ.get('TOKCOUNT_BASE_URL', 'https://tokcount.com/')
+        # 'script' grabs the whole layout in one injected script,
+        # 'elements' queries text/location per element over WebDriver
+        self.layout_capture = layout_capture
+        # Counters must be unchanged for settle_quiet_window seconds;
+        # settle_timeout is the hard upper bound on the wait
+        self.settle_quiet_window = settle_quiet_window
+        self.settle_timeout = settle_timeout
+        # Visual layout, tree snapshot and DOM keyword strategies, ordered by
+        # their success rate and cost on this page layout (shared by default)
+        self.extraction = extraction_cascade if extraction_cascade is not None else default_cascade
         self.options = Options()
         if headless:
             self.options.add_argument('--headless')
@@ -19,12 +42,18 @@ class TokCountFixedDigits:
         self.options.add_argument('--disable-gpu')
         self.options.add_argument('--window-size=1920,1080')
         self.options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+        # DevTools blocklist for images/fonts/ads/analytics
+        self.network_blocker = network_blocker if network_blocker is not None else NetworkBlocker()
+        self.network_blocker.configure_options(self.options)
+        # Failure/sampled screenshots, written by a background thread
+        self.artifacts = artifact_recorder if artifact_recorder is not None else ArtifactRecorder()
         self.driver = None
     
     def start_driver(self):
         try:
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=self.options)
+            # Resolved once (webdriver-manager included) and cached on disk
+            self.driver = default_discovery.launch(self.options)
+            self.network_blocker.apply(self.driver)
             return True
         except Exception as e:
             print(f"❌ Error starting driver: {e}")
@@ -44,7 +73,9 @@ class TokCountFixedDigits:
             print(f"\n🔍 Looking for {keyword}...")
             
             # Find the keyword element
-            keyword_elements = self.driver.find_elements(By.XPATH, f"//*[contains(text(), '{keyword}')]")
+            with span('find_keyword_elements', keyword=keyword) as attrs:
+                keyword_elements = self.driver.find_elements(By.XPATH, f"//*[contains(text(), '{keyword}')]")
+                attrs['elements'] = len(keyword_elements)
             
             if not keyword_elements:
                 print(f"❌ '{keyword}' not found")
@@ -56,74 +87,52 @@ class TokCountFixedDigits:
                 try:
                     # Get the container that holds both the number and the keyword
                     # Try different parent levels
-                    containers = [
-                        keyword_elem.find_element(By.XPATH, "./.."),  # Direct parent
-                        keyword_elem.find_element(By.XPATH, "./../.."),  # Grandparent
-                        keyword_elem.find_element(By.XPATH, "./../../.."),  # Great-grandparent
-                    ]
+                    with span('find_containers', keyword=keyword):
+                        containers = [
+                            keyword_elem.find_element(By.XPATH, "./.."),  # Direct parent
+                            keyword_elem.find_element(By.XPATH, "./../.."),  # Grandparent
+                            keyword_elem.find_element(By.XPATH, "./../../.."),  # Great-grandparent
+                        ]
                     
-                    for container in containers:
+                    for level, container in enumerate(containers, 1):
                         try:
                             # Get all elements in this container
-                            all_elements = container.find_elements(By.XPATH, ".//*")
+                            with span('find_container_elements', keyword=keyword, level=level) as attrs:
+                                all_elements = container.find_elements(By.XPATH, ".//*")
+                                attrs['elements'] = len(all_elements)
                             
                             # Filter elements that contain single digits or commas
-                            digit_elements = []
+                            digit_nodes = []
                             
-                            for elem in all_elements:
-                                try:
-                                    text = elem.text.strip()
-                                    # Only single digits, commas, or very short numbers
-                                    if text and re.match(r'^[\d,]{1,2}$', text):
-                                        position = self.get_element_position(elem)
-                                        digit_elements.append({
-                                            'text': text,
-                                            'position': position,
-                                            'element': elem
-                                        })
-                                except:
-                                    continue
+                            with span('read_digit_elements', keyword=keyword, level=level, elements=len(all_elements)):
+                                for elem in all_elements:
+                                    try:
+                                        text = elem.text.strip()
+                                        # Only single digits, commas, or very short numbers
+                                        if text and DIGIT_PATTERN.match(text):
+                                            y, x = self.get_element_position(elem)
+                                            digit_nodes.append((text, x, y))
+                                    except:
+                                        continue
                             
-                            if not digit_elements:
+                            if not digit_nodes:
                                 continue
                             
                             # Sort by position (top to bottom, left to right)
-                            digit_elements.sort(key=lambda x: x['position'])
+                            digit_nodes.sort(key=lambda node: (node[2], node[1]))
+                            
+                            # Remove duplicates within 5 pixels of each other
+                            unique_digits = dedupe_positions(digit_nodes, 5)
                             
-                            # Remove duplicates based on position proximity
-                            unique_digits = []
-                            for digit in digit_elements:
-                                # Check if this position is too close to existing ones
-                                is_duplicate = False
-                                for existing in unique_digits:
-                                    y_diff = abs(digit['position'][0] - existing['position'][0])
-                                    x_diff = abs(digit['position'][1] - existing['position'][1])
-                                    
-                                    # If positions are very close (within 5 pixels), consider duplicate
-                                    if y_diff < 5 and x_diff < 5:
-                                        is_duplicate = True
-                                        break
-                                
-                                if not is_duplicate:
-                                    unique_digits.append(digit)
+                            # Build the number from unique digits
+                            number_parts = [node[0] for node in unique_digits]
+                            number_str = join_digits(unique_digits)
                             
-                            if unique_digits:
-                                # Build the number from unique digits
-                                number_parts = [d['text'] for d in unique_digits]
-                                number_str = ''.join(number_parts)
-                                
-                                # Clean up the number
-                                number_str = re.sub(r',+', ',', number_str)  # Multiple commas to single
-                                number_str = number_str.strip(',')  # Remove leading/trailing commas
-                                
-                                # Validate it's a reasonable number
-                                try:
-                                    test_num = int(number_str.replace(',', ''))
-                                    if test_num > 0:
-                                        print(f"✅ {keyword}: {number_parts} -> {number_str}")
-                                        return number_str
-                                except:
-                                    continue
+                            # Validate it's a reasonable number
+                            test_num = parse_count(number_str)
+                            if test_num is not None and test_num > 0:
+                                print(f"✅ {keyword}: {number_parts} -> {number_str}")
+                                return number_str
                         
                         except Exception as e:
                             continue
@@ -138,104 +147,46 @@ class TokCountFixedDigits:
             print(f"❌ Error extracting {keyword}: {e}")
             return None
     
+    def collect_text_nodes(self):
+        """Get (text, x, y) for every text-bearing element on the page"""
+        if self.layout_capture == 'script':
+            with span('capture_layout_snapshot') as attrs:
+                snapshot = capture_layout_snapshot(self.driver)
+                attrs['nodes'] = len(snapshot) if snapshot is not None else None
+            if snapshot is not None:
+                return [(node['text'], node['x'], node['y']) for node in snapshot]
+        
+        # Slow path: two WebDriver round trips per element
+        nodes = []
+        with span('find_elements_text', xpath="//*[text()]") as attrs:
+            elements = self.driver.find_elements(By.XPATH, "//*[text()]")
+            attrs['elements'] = len(elements)
+        with span('read_element_positions', elements=len(elements)):
+            for elem in elements:
+                try:
+                    text = elem.text.strip()
+                    if text:
+                        y, x = self.get_element_position(elem)
+                        nodes.append((text, x, y))
+                except:
+                    continue
+        return nodes
+    
     def extract_stats_by_visual_layout(self):
         """Extract stats by analyzing visual layout"""
         try:
             print("\n📐 Analyzing visual layout...")
             
-            # Get all elements with single digits or short text
-            all_elements = self.driver.find_elements(By.XPATH, "//*[text()]")
-            
-            # Categorize elements
-            digit_elements = []
-            keyword_elements = []
-            
-            for elem in all_elements:
-                try:
-                    text = elem.text.strip()
-                    if not text:
-                        continue
-                    
-                    position = self.get_element_position(elem)
-                    
-                    # Single digits or commas
-                    if re.match(r'^[\d,]{1,2}$', text):
-                        digit_elements.append({
-                            'text': text,
-                            'position': position,
-                            'element': elem
-                        })
-                    
-                    # Keywords
-                    elif text in ['Followers', 'Likes', 'Following', 'Videos']:
-                        keyword_elements.append({
-                            'text': text,
-                            'position': position,
-                            'element': elem
-                        })
-                
-                except:
-                    continue
+            # Categorize text nodes into single digits/commas and keywords
+            digit_elements, keyword_elements = classify_nodes(self.collect_text_nodes())
             
             print(f"📊 Found {len(digit_elements)} digit elements, {len(keyword_elements)} keywords")
             
             # Group digits by proximity to keywords
-            stats = {}
-            
-            for keyword_elem in keyword_elements:
-                keyword = keyword_elem['text']
-                keyword_pos = keyword_elem['position']
-                
-                # Find digits that are close to this keyword (above or to the left)
-                nearby_digits = []
-                
-                for digit_elem in digit_elements:
-                    digit_pos = digit_elem['position']
-                    
-                    # Calculate distance
-                    y_distance = keyword_pos[0] - digit_pos[0]  # Positive if digit is above
-                    x_distance = abs(keyword_pos[1] - digit_pos[1])  # Horizontal distance
-                    
-                    # Digits should be close vertically and horizontally
-                    if 0 <= y_distance <= 100 and x_distance <= 200:  # Within reasonable range
-                        nearby_digits.append({
-                            'text': digit_elem['text'],
-                            'position': digit_pos,
-                            'distance': y_distance + x_distance  # Combined distance
-                        })
-                
-                if nearby_digits:
-                    # Sort by position (left to right, top to bottom)
-                    nearby_digits.sort(key=lambda x: (x['position'][0], x['position'][1]))
-                    
-                    # Remove duplicates based on position
-                    unique_digits = []
-                    for digit in nearby_digits:
-                        is_duplicate = False
-                        for existing in unique_digits:
-                            y_diff = abs(digit['position'][0] - existing['position'][0])
-                            x_diff = abs(digit['position'][1] - existing['position'][1])
-                            
-                            if y_diff < 10 and x_diff < 10:  # Very close positions
-                                is_duplicate = True
-                                break
-                        
-                        if not is_duplicate:
-                            unique_digits.append(digit)
-                    
-                    # Build number
-                    if unique_digits:
-                        number_parts = [d['text'] for d in unique_digits]
-                        number_str = ''.join(number_parts)
-                        number_str = re.sub(r',+', ',', number_str).strip(',')
-                        
-                        try:
-                            test_num = int(number_str.replace(',', ''))
-                            if test_num >= 0:  # Allow 0 for following
-                                stats[keyword.lower()] = number_str
-                                print(f"✅ {keyword}: {number_parts} -> {number_str}")
-                        except:
-                            continue
+            with span('group_stats_by_layout', digits=len(digit_elements), keywords=len(keyword_elements)):
+                stats = group_stats_by_layout(digit_elements, keyword_elements)
+            for key, value in stats.items():
+                print(f"✅ {key.title()}: {value}")
             
             return stats
             
@@ -243,38 +194,46 @@ class TokCountFixedDigits:
             print(f"❌ Error in visual layout analysis: {e}")
             return {}
     
+    def build_url(self, username):
+        """tokcount page for a username"""
+        separator = '&' if '?' in self.base_url else '?'
+        return f"{self.base_url}{separator}user={username}"
+    
     def scrape_user_data(self, username):
         """Main scraping function"""
         if not self.driver:
             if not self.start_driver():
                 return None
         
-        url = f"https://tokcount.com/?user={username}"
+        url = self.build_url(username)
         
         try:
             print(f"🌐 Loading: {url}")
-            self.driver.get(url)
-            
-            # Wait for page load
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
+            with scrape_phase('page_load'):
+                self.driver.get(url)
+                
+                # Wait for page load
+                WebDriverWait(self.driver, 20).until(
+                    EC.presence_of_element_located((By.TAG_NAME, "body"))
+                )
             
             # Wait for animations to complete
-            print("⏳ Waiting for digit animations...")
-            time.sleep(12)  # Longer wait for animations
-            
-            # Try visual layout method first
-            stats = self.extract_stats_by_visual_layout()
+            print("⏳ Waiting for digit animations to settle...")
+            settle_seconds, settled = wait_for_stats_settle(
+                self.driver,
+                quiet_window=self.settle_quiet_window,
+                timeout=self.settle_timeout
+            )
+            observe_phase('settle', settle_seconds)
+            if settled:
+                print(f"⏱️ Animations settled after {settle_seconds:.2f}s")
+            else:
+                print(f"⚠️  Animations not settled after {settle_seconds:.2f}s, extracting anyway")
             
-            # Fill in missing stats with keyword method
-            keywords = ['Followers', 'Likes', 'Following', 'Videos']
-            for keyword in keywords:
-                key = keyword.lower()
-                if key not in stats or stats[key] == 'Not found':
-                    result = self.extract_stat_by_keyword(keyword)
-                    if result:
-                        stats[key] = result
+            # Cheapest likely strategy first, stops once all four stats are found
+            stats, sources = self.extraction.run(self)
+            for key, strategy in sources.items():
+                print(f"🧩 {key.title()} from {strategy}")
             
             # Ensure all keys exist
             final_stats = {
@@ -282,20 +241,22 @@ class TokCountFixedDigits:
                 'followers': stats.get('followers', 'Not found'),
                 'likes': stats.get('likes', 'Not found'),
                 'following': stats.get('following', 'Not found'),
-                'videos': stats.get('videos', 'Not found')
+                'videos': stats.get('videos', 'Not found'),
+                'settle_seconds': round(settle_seconds, 2),
+                'extraction': sources,
+                'network': self.network_blocker.collect(self.driver)
             }
             
-            # Take screenshot
-            try:
-                self.driver.save_screenshot(f"{username}_fixed_digits_screenshot.png")
-                print(f"📸 Screenshot: {username}_fixed_digits_screenshot.png")
-            except:
-                pass
+            # Screenshot only when the artifact mode asks for one
+            failed = any(final_stats[key] == 'Not found' for key in ('followers', 'likes', 'following', 'videos'))
+            if self.artifacts.capture(self.driver, username, failed=failed):
+                print(f"📸 Screenshot queued for {self.artifacts.directory}/")
             
             return final_stats
             
         except Exception as e:
             print(f"❌ Error scraping: {e}")
+            self.artifacts.capture(self.driver, username, failed=True)
             return None
     
     def close_driver(self):
@@ -327,7 +288,7 @@ def main():
         # Validate results look reasonable
         print(f"\n🔍 VALIDATION:")
         for key, value in user_data.items():
-            if key != 'username' and value != 'Not found':
+            if key not in ('username', 'settle_seconds', 'extraction', 'network') and value != 'Not found':
                 try:
                     num = int(value.replace(',', ''))
                     if key == 'followers' and num > 1000:
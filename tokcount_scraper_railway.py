@@ -1,20 +1,40 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 import time
-import re
 import logging
 import os
 
+from layout_snapshot import capture_layout_snapshot
+from layout_grouping import classify_nodes, group_stats_by_layout
+from network_blocking import NetworkBlocker
+from driver_discovery import default_discovery
+from debug_artifacts import ArtifactRecorder
+from animation_settle import wait_for_stats_settle, SettleTracker, SETTLE_PROBE_JS
+from metrics import scrape_phase, observe_phase
+from tracing import span, profiled
+
 logger = logging.getLogger(__name__)
 
 class TokCountScraperRailway:
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, layout_capture='script', settle_quiet_window=2.0, settle_timeout=12,
+                 network_blocker=None, artifact_recorder=None, base_url=None):
         self.driver = None
         self.headless = headless
+        # Page the user is appended to; TOKCOUNT_BASE_URL points it at a stand-in
+        self.base_url = base_url or os.environ.get('TOKCOUNT_BASE_URL', 'https://tokcount.com/')
+        # Failure/sampled screenshots, written by a background thread
+        self.artifacts = artifact_recorder if artifact_recorder is not None else ArtifactRecorder()
+        # DevTools blocklist for images/fonts/ads/analytics (shared counters if passed in)
+        self.network_blocker = network_blocker if network_blocker is not None else NetworkBlocker()
+        # Counters must be unchanged for settle_quiet_window seconds;
+        # settle_timeout is the hard upper bound on the wait
+        self.settle_quiet_window = settle_quiet_window
+        self.settle_timeout = settle_timeout
+        # 'script' grabs the whole layout in one injected script,
+        # 'elements' queries text/location per element over WebDriver
+        self.layout_capture = layout_capture
         self.setup_driver()
     
     def setup_driver(self):
@@ -31,68 +51,17 @@ class TokCountScraperRailway:
             options.add_argument('--disable-gpu')
             options.add_argument('--disable-extensions')
             options.add_argument('--disable-plugins')
-            options.add_argument('--disable-images')
             options.add_argument('--window-size=1920,1080')
-            options.add_argument('--remote-debugging-port=9222')
-            
-            # Try different Chrome binary locations
-            chrome_paths = [
-                '/usr/bin/chromium',
-                '/usr/bin/chromium-browser', 
-                '/usr/bin/google-chrome',
-                '/usr/bin/google-chrome-stable',
-                '/app/.chrome-for-testing/chrome-linux64/chrome',
-                os.environ.get('GOOGLE_CHROME_BIN'),
-                None
-            ]
-            
-            driver_created = False
-            
-            for chrome_path in chrome_paths:
-                if chrome_path and not os.path.exists(chrome_path):
-                    continue
-                    
-                try:
-                    if chrome_path:
-                        options.binary_location = chrome_path
-                        logger.info(f"Trying Chrome at: {chrome_path}")
-                    
-                    # Try different ChromeDriver paths
-                    chromedriver_paths = [
-                        '/usr/bin/chromedriver',
-                        os.environ.get('CHROMEDRIVER_PATH'),
-                        None  # Let webdriver-manager handle it
-                    ]
-                    
-                    for driver_path in chromedriver_paths:
-                        try:
-                            if driver_path and os.path.exists(driver_path):
-                                service = Service(driver_path)
-                                logger.info(f"Using ChromeDriver at: {driver_path}")
-                            else:
-                                # Try webdriver-manager as fallback
-                                from webdriver_manager.chrome import ChromeDriverManager
-                                service = Service(ChromeDriverManager().install())
-                                logger.info("Using webdriver-manager")
-                            
-                            self.driver = webdriver.Chrome(service=service, options=options)
-                            logger.info(f"✅ Chrome driver initialized successfully")
-                            driver_created = True
-                            break
-                            
-                        except Exception as e:
-                            logger.warning(f"Failed with driver path {driver_path}: {e}")
-                            continue
-                    
-                    if driver_created:
-                        break
-                        
-                except Exception as e:
-                    logger.warning(f"Failed with Chrome path {chrome_path}: {e}")
-                    continue
+            self.network_blocker.configure_options(options)
+            
+            # Keep animations running in background tabs (multi-tab scraping)
+            options.add_argument('--disable-background-timer-throttling')
+            options.add_argument('--disable-renderer-backgrounding')
+            options.add_argument('--disable-backgrounding-occluded-windows')
             
-            if not driver_created:
-                raise Exception("Could not initialize Chrome driver")
+            # Chrome binary / chromedriver pair is probed once and cached on disk
+            self.driver = default_discovery.launch(options)
+            self.network_blocker.apply(self.driver)
                 
             return True
             
@@ -108,89 +77,41 @@ class TokCountScraperRailway:
         except:
             return (0, 0)
     
-    def extract_stats_by_visual_layout(self):
-        """Extract stats using visual layout analysis"""
-        try:
-            all_elements = self.driver.find_elements(By.XPATH, "//*[text()]")
-            
-            digit_elements = []
-            keyword_elements = []
-            
-            for elem in all_elements:
+    def collect_text_nodes(self):
+        """Get (text, x, y) for every text-bearing element on the page"""
+        if self.layout_capture == 'script':
+            with span('capture_layout_snapshot') as attrs:
+                snapshot = capture_layout_snapshot(self.driver)
+                attrs['nodes'] = len(snapshot) if snapshot is not None else None
+            if snapshot is not None:
+                return [(node['text'], node['x'], node['y']) for node in snapshot]
+        
+        nodes = []
+        with span('find_elements_text', xpath="//*[text()]") as attrs:
+            elements = self.driver.find_elements(By.XPATH, "//*[text()]")
+            attrs['elements'] = len(elements)
+        with span('read_element_positions', elements=len(elements)):
+            for elem in elements:
                 try:
                     text = elem.text.strip()
-                    if not text:
-                        continue
-                    
-                    position = self.get_element_position(elem)
-                    
-                    if re.match(r'^[\d,]{1,2}$', text):
-                        digit_elements.append({
-                            'text': text,
-                            'position': position,
-                            'element': elem
-                        })
-                    elif text in ['Followers', 'Likes', 'Following', 'Videos']:
-                        keyword_elements.append({
-                            'text': text,
-                            'position': position,
-                            'element': elem
-                        })
-                
+                    if text:
+                        y, x = self.get_element_position(elem)
+                        nodes.append((text, x, y))
                 except:
                     continue
+        return nodes
+    
+    def extract_stats_by_visual_layout(self):
+        """Extract stats using visual layout analysis"""
+        try:
+            digit_elements, keyword_elements = classify_nodes(self.collect_text_nodes())
             
             logger.info(f"Found {len(digit_elements)} digit elements, {len(keyword_elements)} keywords")
             
-            stats = {}
-            
-            for keyword_elem in keyword_elements:
-                keyword = keyword_elem['text']
-                keyword_pos = keyword_elem['position']
-                
-                nearby_digits = []
-                
-                for digit_elem in digit_elements:
-                    digit_pos = digit_elem['position']
-                    y_distance = keyword_pos[0] - digit_pos[0]
-                    x_distance = abs(keyword_pos[1] - digit_pos[1])
-                    
-                    if 0 <= y_distance <= 100 and x_distance <= 200:
-                        nearby_digits.append({
-                            'text': digit_elem['text'],
-                            'position': digit_pos,
-                            'distance': y_distance + x_distance
-                        })
-                
-                if nearby_digits:
-                    nearby_digits.sort(key=lambda x: (x['position'][0], x['position'][1]))
-                    
-                    unique_digits = []
-                    for digit in nearby_digits:
-                        is_duplicate = False
-                        for existing in unique_digits:
-                            y_diff = abs(digit['position'][0] - existing['position'][0])
-                            x_diff = abs(digit['position'][1] - existing['position'][1])
-                            
-                            if y_diff < 10 and x_diff < 10:
-                                is_duplicate = True
-                                break
-                        
-                        if not is_duplicate:
-                            unique_digits.append(digit)
-                    
-                    if unique_digits:
-                        number_parts = [d['text'] for d in unique_digits]
-                        number_str = ''.join(number_parts)
-                        number_str = re.sub(r',+', ',', number_str).strip(',')
-                        
-                        try:
-                            test_num = int(number_str.replace(',', ''))
-                            if test_num >= 0:
-                                stats[keyword.lower()] = number_str
-                                logger.info(f"Extracted {keyword}: {number_str}")
-                        except:
-                            continue
+            with span('group_stats_by_layout', digits=len(digit_elements), keywords=len(keyword_elements)):
+                stats = group_stats_by_layout(digit_elements, keyword_elements)
+            for key, value in stats.items():
+                logger.info(f"Extracted {key.title()}: {value}")
             
             return stats
             
@@ -198,47 +119,156 @@ class TokCountScraperRailway:
             logger.error(f"Error in visual layout analysis: {e}")
             return {}
     
+    def build_url(self, username):
+        """tokcount page for a username"""
+        separator = '&' if '?' in self.base_url else '?'
+        return f"{self.base_url}{separator}user={username}"
+    
+    def build_result(self, username, stats, settle_seconds):
+        """Final result dict with every stat key present"""
+        return {
+            'username': username,
+            'followers': stats.get('followers', 'Not found'),
+            'likes': stats.get('likes', 'Not found'),
+            'following': stats.get('following', 'Not found'),
+            'videos': stats.get('videos', 'Not found'),
+            'settle_seconds': round(settle_seconds, 2)
+        }
+    
     def scrape_user_data(self, username):
         """Main scraping function"""
         if not self.driver:
             if not self.setup_driver():
                 return None
         
-        url = f"https://tokcount.com/?user={username}"
+        url = self.build_url(username)
         
         try:
             logger.info(f"🌐 Loading: {url}")
-            self.driver.get(url)
+            with scrape_phase('page_load'):
+                self.driver.get(url)
+                
+                WebDriverWait(self.driver, 20).until(
+                    EC.presence_of_element_located((By.TAG_NAME, "body"))
+                )
             
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
+            logger.info("⏳ Waiting for digit animations to settle...")
+            settle_seconds, settled = wait_for_stats_settle(
+                self.driver,
+                quiet_window=self.settle_quiet_window,
+                timeout=self.settle_timeout
             )
+            observe_phase('settle', settle_seconds)
+            if settled:
+                logger.info(f"⏱️ Animations settled after {settle_seconds:.2f}s")
+            else:
+                logger.warning(f"⏱️ Animations not settled after {settle_seconds:.2f}s, extracting anyway")
             
-            logger.info("⏳ Waiting for digit animations...")
-            time.sleep(12)
+            with scrape_phase('layout_extraction'), profiled('layout_extraction'):
+                stats = self.extract_stats_by_visual_layout()
             
-            stats = self.extract_stats_by_visual_layout()
+            final_stats = self.build_result(username, stats, settle_seconds)
+            with span('network_collect'):
+                final_stats['network'] = self.network_blocker.collect(self.driver)
             
-            final_stats = {
-                'username': username,
-                'followers': stats.get('followers', 'Not found'),
-                'likes': stats.get('likes', 'Not found'),
-                'following': stats.get('following', 'Not found'),
-                'videos': stats.get('videos', 'Not found')
-            }
-            
-            try:
-                self.driver.save_screenshot(f"{username}_railway_screenshot.png")
-                logger.info(f"📸 Screenshot: {username}_railway_screenshot.png")
-            except:
-                pass
+            failed = any(final_stats[key] == 'Not found' for key in ('followers', 'likes', 'following', 'videos'))
+            self.artifacts.capture(self.driver, username, failed=failed)
             
             return final_stats
             
         except Exception as e:
             logger.error(f"Error scraping data: {e}")
+            self.artifacts.capture(self.driver, username, failed=True)
             return None
     
+    def scrape_many(self, usernames, tabs=3, poll_interval=0.25):
+        """Scrape several users in one Chrome session, one tab per user in flight
+        
+        Tabs are navigated without blocking and polled in turn, so while one
+        tab's counters animate the others keep loading. Whichever tab settles
+        first is extracted and reused for the next username.
+        Returns {username: result dict or None}.
+        """
+        if not self.driver:
+            if not self.setup_driver():
+                return {username: None for username in usernames}
+        
+        pending = list(usernames)
+        results = {}
+        active = {}  # window handle -> (username, SettleTracker)
+        main_handle = self.driver.current_window_handle
+        handles = [main_handle]
+        
+        def start(handle, username):
+            url = self.build_url(username)
+            try:
+                self.driver.switch_to.window(handle)
+                logger.info(f"🌐 Loading in tab: {url}")
+                self.driver.execute_script("window.location.href = arguments[0];", url)
+                active[handle] = (username, SettleTracker(
+                    quiet_window=self.settle_quiet_window,
+                    timeout=self.settle_timeout,
+                    expected_user=username
+                ))
+            except Exception as e:
+                logger.error(f"Error loading {username} in tab: {e}")
+                results[username] = None
+        
+        try:
+            for _ in range(min(tabs, len(pending)) - 1):
+                self.driver.switch_to.new_window('tab')
+                # The CDP blocklist is per target, so every new tab needs its own
+                self.network_blocker.apply(self.driver)
+                handles.append(self.driver.current_window_handle)
+            
+            for handle in handles:
+                if pending:
+                    start(handle, pending.pop(0))
+            
+            while active:
+                for handle in list(active):
+                    username, tracker = active[handle]
+                    try:
+                        self.driver.switch_to.window(handle)
+                        outcome = tracker.update(self.driver.execute_script(SETTLE_PROBE_JS))
+                        if outcome is None:
+                            continue
+                        settle_seconds, settled = outcome
+                        observe_phase('settle', settle_seconds)
+                        if not settled:
+                            logger.warning(f"⏱️ {username} not settled after {settle_seconds:.2f}s, extracting anyway")
+                        with scrape_phase('layout_extraction'):
+                            stats = self.extract_stats_by_visual_layout()
+                        results[username] = self.build_result(username, stats, settle_seconds)
+                    except Exception as e:
+                        logger.error(f"Error scraping {username} in tab: {e}")
+                        results[username] = None
+                    
+                    del active[handle]
+                    while pending and handle not in active:
+                        start(handle, pending.pop(0))
+                
+                if active:
+                    time.sleep(poll_interval)
+        
+        finally:
+            for handle in handles[1:]:
+                try:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+                except:
+                    pass
+            try:
+                self.driver.switch_to.window(main_handle)
+                # Drain the tabs' traffic into the totals so it is not billed to the next page
+                self.network_blocker.collect(self.driver)
+            except:
+                pass
+        
+        for username in pending:
+            results.setdefault(username, None)
+        return results
+    
     def close_driver(self):
         """Close the browser driver"""
         if self.driver:
@@ -0,0 +1,211 @@
+"""
+Local stand-in for tokcount.com
+
+Serves the counter JSON the HTTP fast path reads and an odometer-style
+page for the Selenium scrapers, so both can be exercised without the real
+site:
+
+    python tokcount_standin.py --port 8765
+    TOKCOUNT_STATS_URL='http://127.0.0.1:8765/stats/{username}' python app.py
+    TOKCOUNT_BASE_URL='http://127.0.0.1:8765/?anim=3000&layout=grid' python app.py
+
+Counts are derived from the username so repeated requests agree. Usernames
+starting with 'missing' return 404 (JSON) or a "user not found" page.
+Query parameters: delay=<ms> slows a response down; on the page,
+anim=<ms> is the odometer animation time, digits=<n> forces n-digit
+follower/like counts and layout=row|grid|column|noisy picks the card
+arrangement (noisy adds decoy numbers away from the stats).
+"""
+
+import argparse
+import hashlib
+import json
+import html
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+
+
+def fake_counts(username):
+    """Deterministic follower/like/following/video counts for a username"""
+    digest = hashlib.sha256(username.lower().encode()).digest()
+    followers = int.from_bytes(digest[0:4], 'big') % 50_000_000
+    return {
+        'followerCount': followers,
+        'heartCount': followers * (1 + digest[4] % 40),
+        'followingCount': int.from_bytes(digest[5:7], 'big') % 5000,
+        'videoCount': int.from_bytes(digest[7:9], 'big') % 3000
+    }
+
+
+LAYOUTS = {'row': 4, 'grid': 2, 'column': 1, 'noisy': 2}
+
+PAGE_LABELS = (
+    ('Followers', 'followerCount'),
+    ('Likes', 'heartCount'),
+    ('Following', 'followingCount'),
+    ('Videos', 'videoCount')
+)
+
+
+def page_counts(username, digits=None):
+    """Counts shown on the page; digits forces followers/likes to that many digits"""
+    counts = fake_counts(username)
+    if digits:
+        low = 10 ** (digits - 1) if digits > 1 else 0
+        for key in ('followerCount', 'heartCount'):
+            counts[key] = low + counts[key] % (10 ** digits - low)
+    return counts
+
+
+def expected_stats(username, digits=None):
+    """What a scraper should extract from the page: {'followers': '12,850', ...}"""
+    counts = page_counts(username, digits)
+    return {label.lower(): f"{counts[key]:,}" for label, key in PAGE_LABELS}
+
+
+def odometer_html(value):
+    parts = []
+    for char in f"{value:,}":
+        if char == ',':
+            parts.append('<span class="odometer-formatting-mark">,</span>')
+        else:
+            # Starts at 0 like tokcount; the script rolls it to data-final
+            parts.append(
+                f'<span class="odometer-digit"><span class="odometer-value" data-final="{char}">0</span></span>'
+            )
+    return f'<div class="odometer">{"".join(parts)}</div>'
+
+
+PAGE_SCRIPT = """
+var DURATION = %d;
+var values = document.querySelectorAll('.odometer-value');
+var start = Date.now();
+function tick() {
+    var elapsed = Date.now() - start;
+    var running = false;
+    for (var i = 0; i < values.length; i++) {
+        var el = values[i];
+        var digits = el.closest('.odometer').querySelectorAll('.odometer-value');
+        var index = Array.prototype.indexOf.call(digits, el);
+        // Leading digits stop first, the last one spins for the full duration
+        var stopAt = DURATION * (0.5 + 0.5 * (index + 1) / digits.length);
+        if (elapsed >= stopAt) {
+            el.textContent = el.getAttribute('data-final');
+        } else {
+            el.textContent = String(Math.floor(Math.random() * 10));
+            running = true;
+        }
+    }
+    if (running) setTimeout(tick, 50);
+}
+tick();
+"""
+
+
+def render_page(username, anim_ms=3000, digits=None, layout='grid'):
+    columns = LAYOUTS.get(layout, 2)
+    title = html.escape(username)
+    if not username or username.lower().startswith('missing'):
+        body = f'<h1>@{title}</h1><p>User not found</p>'
+    else:
+        counts = page_counts(username, digits)
+        cards = ''.join(
+            f'<div class="card">{odometer_html(counts[key])}<div class="label">{label}</div></div>'
+            for label, key in PAGE_LABELS
+        )
+        body = f'<h1>@{title}</h1><div class="cards">{cards}</div>'
+        if layout == 'noisy':
+            # Numbers far from any stat label: rankings and an ad banner
+            body += (
+                '<div class="noise"><ol>' + ''.join(f'<li><span>{i}</span> creator{i}</li>' for i in range(1, 6))
+                + '</ol><div class="ad">Top <span>10</span> tips, <span>3</span> days left</div></div>'
+            )
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>TokCount stand-in</title><style>
+body {{ font-family: Arial, sans-serif; margin: 0; padding: 40px; }}
+.cards {{ display: grid; grid-template-columns: repeat({columns}, 300px); gap: 40px 30px; }}
+.card {{ text-align: center; padding: 20px 0; }}
+.odometer {{ font-size: 28px; height: 36px; white-space: nowrap; }}
+.odometer-digit {{ display: inline-block; width: 18px; }}
+.label {{ display: inline-block; margin-top: 12px; font-size: 16px; }}
+.noise {{ margin-top: 400px; }}
+</style></head><body>{body}<script>{PAGE_SCRIPT % anim_ms}</script></body></html>"""
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_body(self, status, body, content_type):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        delay = float(query.get('delay', ['0'])[0])
+        if delay:
+            time.sleep(delay / 1000.0)
+
+        if url.path.startswith('/stats/'):
+            username = unquote(url.path[len('/stats/'):])
+            if not username or username.lower().startswith('missing'):
+                self.send_body(404, json.dumps({'error': 'user not found'}), 'application/json')
+                return
+            payload = {'userInfo': {'user': {'uniqueId': username}, 'stats': fake_counts(username)}}
+            self.send_body(200, json.dumps(payload), 'application/json')
+            return
+
+        if url.path == '/':
+            defaults = self.server.page_defaults
+            username = query.get('user', [''])[0]
+            page = render_page(
+                username,
+                anim_ms=int(query.get('anim', [defaults['anim_ms']])[0]),
+                digits=int(query['digits'][0]) if 'digits' in query else defaults['digits'],
+                layout=query.get('layout', [defaults['layout']])[0]
+            )
+            self.send_body(200, page, 'text/html; charset=utf-8')
+            return
+
+        self.send_body(404, json.dumps({'error': 'not found'}), 'application/json')
+
+
+def make_server(host='127.0.0.1', port=8765, verbose=False, anim_ms=3000, digits=None, layout='grid'):
+    server = ThreadingHTTPServer((host, port), StandInHandler)
+    server.daemon_threads = True
+    server.verbose = verbose
+    server.page_defaults = {'anim_ms': anim_ms, 'digits': digits, 'layout': layout}
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--verbose', action='store_true')
+    parser.add_argument('--anim-ms', type=int, default=3000, help='default odometer animation time')
+    parser.add_argument('--digits', type=int, help='default follower/like digit count')
+    parser.add_argument('--layout', choices=sorted(LAYOUTS), default='grid', help='default page layout')
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.verbose, args.anim_ms, args.digits, args.layout)
+    print(f"🧪 tokcount stand-in on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Shutting down...")
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
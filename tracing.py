@@ -0,0 +1,216 @@
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import uuid
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+_current_trace = contextvars.ContextVar('trace', default=None)
+_current_span = contextvars.ContextVar('span', default=None)
+
+
+class Trace:
+    """Spans of one request; shared by every thread the request's context reaches"""
+
+    def __init__(self, name, trace_id=None, profile=False):
+        self.id = trace_id or uuid.uuid4().hex
+        self.name = name
+        self.profile = profile
+        self.spans = []
+        self.profiles = []
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self.spans.append(record)
+
+
+class JsonLinesSink:
+    """Appends span records to a JSON lines file, rotated to path.1 past max_bytes"""
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def __call__(self, records):
+        lines = ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in records)
+        with self._lock:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+                    os.replace(self.path, f"{self.path}.1")
+                with open(self.path, 'a') as f:
+                    f.write(lines)
+            except OSError as e:
+                logger.warning(f"Could not write trace spans to {self.path}: {e}")
+
+
+def default_sink():
+    path = os.environ.get('TRACE_FILE', 'traces/spans.jsonl')
+    return JsonLinesSink(path) if path else None
+
+
+# Called with a finished trace's span records; swap with set_sink()
+_sink = default_sink()
+
+
+def set_sink(sink):
+    """Install a callable(records) for finished traces, or None to drop them"""
+    global _sink
+    _sink = sink
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def _record(trace, name, parent, start, duration, attrs, span_id=None):
+    record = {
+        'trace_id': trace.id,
+        'span_id': span_id or uuid.uuid4().hex[:16],
+        'parent_id': parent,
+        'name': name,
+        'start': round(start, 6),
+        'duration_ms': round(duration * 1000, 3),
+        'thread': threading.current_thread().name
+    }
+    if attrs:
+        record['attrs'] = attrs
+    trace.add(record)
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time a block as a child of the current span; a no-op outside a trace
+
+    Yields the attrs dict so the block can add attributes (e.g. counts).
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield attrs
+        return
+    span_id = uuid.uuid4().hex[:16]
+    parent = _current_span.get()
+    token = _current_span.set(span_id)
+    start = time.time()
+    began = time.perf_counter()
+    try:
+        yield attrs
+    except Exception as e:
+        attrs['error'] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        _record(trace, name, parent, start, time.perf_counter() - began, attrs, span_id)
+
+
+def record_span(name, duration, **attrs):
+    """Add a span measured elsewhere (e.g. one tab's settle time in scrape_many)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        _record(trace, name, _current_span.get(), time.time() - duration, duration, attrs)
+
+
+@contextmanager
+def trace(name, trace_id=None, profile=False, **attrs):
+    """Start a trace with a root span; its spans go to the sink when it ends"""
+    current = Trace(name, trace_id, profile)
+    token = _current_trace.set(current)
+    try:
+        with span(name, **attrs):
+            yield current
+    finally:
+        _current_trace.reset(token)
+        if _sink is not None:
+            try:
+                _sink(current.spans)
+            except Exception as e:
+                logger.warning(f"Trace sink failed: {e}")
+
+
+# cProfile can only run one profiler at a time per process
+_profile_lock = threading.Lock()
+
+
+class ProfileStore:
+    """cProfile dumps for traces that asked for profiling, capped at max_files
+
+    Defaults come from PROFILE_DIR and PROFILE_MAX_FILES.
+    """
+
+    def __init__(self, directory=None, max_files=None):
+        self.directory = directory or os.environ.get('PROFILE_DIR', 'profiles')
+        self.max_files = int(max_files or os.environ.get('PROFILE_MAX_FILES', 50))
+        self._lock = threading.Lock()
+
+    def path(self, trace_id, name):
+        return os.path.join(self.directory, f"{trace_id}-{name}.prof")
+
+    def save(self, profiler, trace_id, name):
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.path(trace_id, name)
+            profiler.dump_stats(path)
+            files = sorted(
+                (os.path.join(self.directory, f) for f in os.listdir(self.directory) if f.endswith('.prof')),
+                key=os.path.getmtime
+            )
+            for old in files[:-self.max_files]:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+        return path
+
+    def find(self, trace_id):
+        """Paths of the profiles stored for a trace"""
+        if not all(c in '0123456789abcdef' for c in trace_id):
+            return []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return sorted(
+            os.path.join(self.directory, name) for name in names
+            if name.startswith(f"{trace_id}-") and name.endswith('.prof')
+        )
+
+    def as_text(self, path, limit=40):
+        out = io.StringIO()
+        pstats.Stats(path, stream=out).sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
+
+
+profile_store = ProfileStore()
+
+
+@contextmanager
+def profiled(name):
+    """Run the block under cProfile when the current trace asked for it"""
+    trace = _current_trace.get()
+    if trace is None or not trace.profile or not _profile_lock.acquire(blocking=False):
+        yield
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+        try:
+            trace.profiles.append(profile_store.save(profiler, trace.id, name))
+        except OSError as e:
+            logger.warning(f"Could not store profile for {trace.id}: {e}")
+    finally:
+        _profile_lock.release()
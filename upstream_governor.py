@@ -0,0 +1,231 @@
+import os
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+from metrics import record_scrape
+
+logger = logging.getLogger(__name__)
+
+STAT_KEYS = ('followers', 'likes', 'following', 'videos')
+
+
+class GovernorTimeout(Exception):
+    """Raised when no upstream slot frees up within the wait timeout"""
+
+
+def is_timeout(error):
+    """Selenium, requests and builtin timeouts all have Timeout in their class name"""
+    return 'Timeout' in type(error).__name__
+
+
+def classify(result):
+    """'ok', 'not_found' or 'failed' for one scrape result (None = failed)"""
+    if not result:
+        return 'failed'
+    if any(result.get(key) == 'Not found' for key in STAT_KEYS):
+        return 'not_found'
+    return 'ok'
+
+
+def classify_many(results):
+    """Worst outcome of a {username: result} batch"""
+    outcomes = {classify(result) for result in results.values()}
+    for outcome in ('failed', 'not_found'):
+        if outcome in outcomes:
+            return outcome
+    return 'ok'
+
+
+def fast_path_outcome(result):
+    """The fast path returns None for misses, which is usually a missing user"""
+    return 'ok' if result else 'not_found'
+
+
+def browser_latency(result, elapsed):
+    """Page load part of a browser scrape: elapsed minus the settle wait"""
+    settle_seconds = (result or {}).get('settle_seconds') or 0
+    return max(0.0, elapsed - settle_seconds)
+
+
+class UpstreamGovernor:
+    """Paces every request to tokcount.com: token bucket plus AIMD concurrency
+
+    Calls wait for both a concurrency slot (limit) and a token (rate per
+    second). Each clean call within its source's latency target raises
+    the limit by 1/limit and the rate by rate_step (additive increase).
+    A timeout, an error, a call slower than its target or a "Not found"
+    rate above not_found_threshold halves both (multiplicative
+    decrease), at most once per cooldown so one burst of failures counts
+    once. Defaults come from GOVERNOR_RATE, GOVERNOR_MAX_RATE,
+    GOVERNOR_MAX_CONCURRENCY, GOVERNOR_LATENCY_BROWSER and
+    GOVERNOR_LATENCY_HTTP.
+    """
+
+    def __init__(self, rate=None, max_rate=None, min_rate=0.05, rate_step=0.05,
+                 min_concurrency=1, max_concurrency=None, latency_targets=None,
+                 not_found_threshold=0.5, cooldown=10, wait_timeout=60):
+        self.max_rate = float(max_rate or os.environ.get('GOVERNOR_MAX_RATE', 5))
+        self.rate = min(self.max_rate, float(rate or os.environ.get('GOVERNOR_RATE', 1)))
+        self.min_rate = min_rate
+        self.rate_step = rate_step
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = int(max_concurrency or os.environ.get('GOVERNOR_MAX_CONCURRENCY', 4))
+        self.limit = float(self.max_concurrency)
+        # Page load (excluding the settle wait) for browser scrapes, whole request for http
+        self.latency_targets = latency_targets or {
+            'browser': float(os.environ.get('GOVERNOR_LATENCY_BROWSER', 10)),
+            'http': float(os.environ.get('GOVERNOR_LATENCY_HTTP', 2))
+        }
+        self.not_found_threshold = not_found_threshold
+        self.cooldown = cooldown
+        self.wait_timeout = wait_timeout
+
+        self._cond = threading.Condition()
+        self._tokens = 1.0
+        self._tokens_at = time.monotonic()
+        self._last_decrease = 0.0
+        self.active = 0
+        self.waiting = 0
+        self.not_found_rate = 0.0
+        self.latency = {}
+        self.outcomes = {'ok': 0, 'not_found': 0, 'failed': 0, 'timeout': 0}
+        self.increases = 0
+        self.decreases = 0
+
+    def _refill(self, now):
+        burst = max(1.0, self.limit)
+        self._tokens = min(burst, self._tokens + (now - self._tokens_at) * self.rate)
+        self._tokens_at = now
+
+    def acquire(self, cost=1, timeout=None):
+        """Block until a slot and cost tokens are available"""
+        timeout = self.wait_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self.waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    # A multi-page call may need more tokens than the bucket holds
+                    needed = min(cost, max(1.0, self.limit))
+                    if self.active < max(self.min_concurrency, int(self.limit)) and self._tokens >= needed:
+                        self._tokens -= cost
+                        self.active += 1
+                        return
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise GovernorTimeout(f"no upstream slot within {timeout:g}s")
+                    token_wait = max(0.0, (needed - self._tokens) / self.rate)
+                    self._cond.wait(min(remaining, token_wait or remaining))
+            finally:
+                self.waiting -= 1
+
+    def release(self, source, outcome, latency=None):
+        """Feed one call's outcome back into the limits"""
+        with self._cond:
+            self.active -= 1
+            self.outcomes[outcome] += 1
+            self.not_found_rate = 0.9 * self.not_found_rate + 0.1 * (outcome == 'not_found')
+            if latency is not None:
+                previous = self.latency.get(source)
+                self.latency[source] = latency if previous is None else 0.8 * previous + 0.2 * latency
+
+            target = self.latency_targets.get(source)
+            slow = latency is not None and target is not None and latency > target
+            overloaded = (
+                outcome in ('failed', 'timeout') or slow
+                or (outcome == 'not_found' and self.not_found_rate > self.not_found_threshold)
+            )
+
+            now = time.monotonic()
+            if overloaded:
+                if now - self._last_decrease >= self.cooldown:
+                    self._last_decrease = now
+                    self.limit = max(float(self.min_concurrency), self.limit / 2)
+                    self.rate = max(self.min_rate, self.rate / 2)
+                    self.decreases += 1
+                    logger.warning(
+                        f"🐢 Upstream {source} {outcome}{' (slow)' if slow else ''}: "
+                        f"backing off to {self.limit:.1f} concurrent, {self.rate:.2f}/s"
+                    )
+            elif outcome == 'ok':
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+                self.rate = min(self.max_rate, self.rate + self.rate_step)
+                self.increases += 1
+            self._cond.notify_all()
+
+    def cancel(self, cost=1):
+        """Give back a slot and its tokens that never reached upstream"""
+        with self._cond:
+            self.active -= 1
+            self._refill(time.monotonic())
+            self._tokens = min(max(1.0, self.limit), self._tokens + cost)
+            self._cond.notify_all()
+
+    @contextmanager
+    def reserve(self, cost=1, timeout=None):
+        """Hold a slot while getting ready for a call, e.g. checking out a driver
+
+        Yields call(source, fn, *args, ...) with call()'s options minus
+        cost. A slot left unused is cancelled, so nothing is counted.
+        """
+        self.acquire(cost, timeout)
+        used = []
+
+        def call(source, fn, *args, **options):
+            used.append(True)
+            return self._run(source, fn, args, cost=cost, **options)
+
+        try:
+            yield call
+        finally:
+            if not used:
+                self.cancel(cost)
+
+    def call(self, source, fn, *args, cost=1, latency=None, outcome=None, many=False):
+        """Run fn(*args) under the governor and feed back outcome(result)
+
+        latency(result, elapsed) may return the upstream part of elapsed
+        (e.g. without the settle wait); defaults to elapsed. many=True
+        means fn returns {username: result}.
+        """
+        self.acquire(cost)
+        return self._run(source, fn, args, cost=cost, latency=latency, outcome=outcome, many=many)
+
+    def _run(self, source, fn, args, cost=1, latency=None, outcome=None, many=False):
+        # The slot is already held; releases it with the outcome
+        outcome = outcome or (classify_many if many else classify)
+        start = time.monotonic()
+        try:
+            result = fn(*args)
+        except Exception as e:
+            failure = 'timeout' if is_timeout(e) else 'failed'
+            self.release(source, failure, time.monotonic() - start)
+            record_scrape(source, failure)
+            raise
+        elapsed = time.monotonic() - start
+        observed = latency(result, elapsed) if latency else elapsed
+        verdict = outcome(result)
+        self.release(source, verdict, observed / cost if observed is not None else None)
+        record_scrape(source, verdict, result.values() if many else [result])
+        return result
+
+    def stats(self):
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                'concurrency_limit': round(self.limit, 2),
+                'max_concurrency': self.max_concurrency,
+                'rate_per_second': round(self.rate, 3),
+                'tokens': round(self._tokens, 2),
+                'active': self.active,
+                'waiting': self.waiting,
+                'latency': {source: round(value, 3) for source, value in self.latency.items()},
+                'not_found_rate': round(self.not_found_rate, 3),
+                'outcomes': dict(self.outcomes),
+                'increases': self.increases,
+                'decreases': self.decreases
+            }
@@ -0,0 +1,286 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+from abc import ABC, abstractmethod
+
+logger = logging.getLogger(__name__)
+
+
+class Task:
+    """One leased unit of work, as handed to a worker"""
+
+    def __init__(self, id, kind, payload, attempts, lease_token):
+        self.id = id
+        self.kind = kind
+        self.payload = payload
+        self.attempts = attempts
+        self.lease_token = lease_token
+
+
+class WorkQueue(ABC):
+    """Interface every queue backend implements
+
+    A task is queued, then leased by one worker for visibility_timeout
+    seconds. The worker acks it with a result, fails it, or extends the
+    lease while it is still busy. A lease that runs out (crashed or stuck
+    worker) makes the task visible again, until max_attempts is reached.
+    Acks and extends carry the lease token, so a worker whose lease expired
+    cannot overwrite the outcome of the redelivery.
+    """
+
+    @abstractmethod
+    def enqueue(self, kind, payload, dedupe_key=None):
+        """Add a task and return its id; an unfinished task with the same dedupe_key is reused"""
+
+    @abstractmethod
+    def lease(self, worker_id, kinds=None, visibility_timeout=None):
+        """Claim the oldest visible task, or return None"""
+
+    @abstractmethod
+    def extend(self, task, visibility_timeout=None):
+        """Push the lease deadline out; False if the lease was lost"""
+
+    @abstractmethod
+    def ack(self, task, result):
+        """Record the result and finish the task; False if the lease was lost"""
+
+    @abstractmethod
+    def fail(self, task, error, retry=True, delay=0):
+        """Give the task back for another attempt, or finish it as failed"""
+
+    @abstractmethod
+    def release(self, task, delay=0):
+        """Give the task back untried, without using up an attempt; False if the lease was lost"""
+
+    @abstractmethod
+    def get(self, task_id):
+        """Status dict for a task (status, attempts, result, error) or None"""
+
+    @abstractmethod
+    def purge(self, max_age):
+        """Delete finished tasks older than max_age seconds; returns the count"""
+
+    @abstractmethod
+    def stats(self):
+        """Task counts by status plus backend details"""
+
+    def wait(self, task_id, timeout, poll_interval=0.2, max_poll_interval=1.0):
+        """Block until the task is finished and return get(task_id), or None on timeout"""
+        deadline = time.monotonic() + timeout
+        interval = poll_interval
+        while True:
+            info = self.get(task_id)
+            if info is None or info['status'] in ('done', 'failed'):
+                return info
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 1.5, max_poll_interval)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    dedupe_key TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    visible_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_token TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_visible ON tasks (status, visible_at);
+CREATE INDEX IF NOT EXISTS tasks_dedupe ON tasks (dedupe_key, status);
+"""
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """WorkQueue in a local SQLite file
+
+    Good for tests and for several processes on one host (WAL mode, one
+    connection per thread). Workers on other hosts need a networked
+    backend registered in BACKENDS.
+    """
+
+    def __init__(self, path, visibility_timeout=60, max_attempts=3):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, fn):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            value = fn(conn)
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return value
+
+    def enqueue(self, kind, payload, dedupe_key=None):
+        def insert(conn):
+            if dedupe_key is not None:
+                row = conn.execute(
+                    "SELECT id FROM tasks WHERE dedupe_key = ? AND status IN ('queued', 'leased') LIMIT 1",
+                    (dedupe_key,)
+                ).fetchone()
+                if row:
+                    return row['id']
+            task_id = uuid.uuid4().hex
+            now = time.time()
+            conn.execute(
+                "INSERT INTO tasks (id, kind, payload, dedupe_key, status, visible_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (task_id, kind, json.dumps(payload), dedupe_key, now, now, now)
+            )
+            return task_id
+        return self._transaction(insert)
+
+    def _expire_exhausted(self, conn, now):
+        """Tasks whose last allowed lease ran out are failed, not redelivered"""
+        conn.execute(
+            "UPDATE tasks SET status = 'failed', error = 'lease expired after max attempts', "
+            "lease_owner = NULL, lease_token = NULL, updated_at = ? "
+            "WHERE status = 'leased' AND visible_at <= ? AND attempts >= ?",
+            (now, now, self.max_attempts)
+        )
+
+    def lease(self, worker_id, kinds=None, visibility_timeout=None):
+        timeout = visibility_timeout or self.visibility_timeout
+
+        def claim(conn):
+            now = time.time()
+            self._expire_exhausted(conn, now)
+            query = ("SELECT id, kind, payload, attempts FROM tasks "
+                     "WHERE status IN ('queued', 'leased') AND visible_at <= ?")
+            params = [now]
+            if kinds:
+                query += f" AND kind IN ({', '.join('?' for _ in kinds)})"
+                params.extend(kinds)
+            row = conn.execute(query + " ORDER BY created_at LIMIT 1", params).fetchone()
+            if row is None:
+                return None
+
+            token = uuid.uuid4().hex
+            if row['attempts'] > 0:
+                logger.info(f"🔁 Redelivering task {row['id']} (attempt {row['attempts'] + 1})")
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', attempts = attempts + 1, visible_at = ?, "
+                "lease_owner = ?, lease_token = ?, updated_at = ? WHERE id = ?",
+                (now + timeout, worker_id, token, now, row['id'])
+            )
+            return Task(row['id'], row['kind'], json.loads(row['payload']), row['attempts'] + 1, token)
+        return self._transaction(claim)
+
+    def _update_leased(self, task, sql, params):
+        cursor = self._conn().execute(
+            sql + " WHERE id = ? AND status = 'leased' AND lease_token = ?",
+            params + (task.id, task.lease_token)
+        )
+        if cursor.rowcount == 0:
+            logger.warning(f"Lease on task {task.id} was lost")
+            return False
+        return True
+
+    def extend(self, task, visibility_timeout=None):
+        now = time.time()
+        return self._update_leased(
+            task, "UPDATE tasks SET visible_at = ?, updated_at = ?",
+            (now + (visibility_timeout or self.visibility_timeout), now)
+        )
+
+    def ack(self, task, result):
+        return self._update_leased(
+            task, "UPDATE tasks SET status = 'done', result = ?, lease_token = NULL, updated_at = ?",
+            (json.dumps(result), time.time())
+        )
+
+    def fail(self, task, error, retry=True, delay=0):
+        now = time.time()
+        if retry and task.attempts < self.max_attempts:
+            return self._update_leased(
+                task, "UPDATE tasks SET status = 'queued', visible_at = ?, error = ?, "
+                      "lease_owner = NULL, lease_token = NULL, updated_at = ?",
+                (now + delay, str(error), now)
+            )
+        return self._update_leased(
+            task, "UPDATE tasks SET status = 'failed', error = ?, lease_token = NULL, updated_at = ?",
+            (str(error), now)
+        )
+
+    def release(self, task, delay=0):
+        now = time.time()
+        return self._update_leased(
+            task, "UPDATE tasks SET status = 'queued', attempts = attempts - 1, visible_at = ?, "
+                  "lease_owner = NULL, lease_token = NULL, updated_at = ?",
+            (now + delay, now)
+        )
+
+    def get(self, task_id):
+        row = self._conn().execute(
+            "SELECT id, kind, status, attempts, lease_owner, result, error, created_at, updated_at "
+            "FROM tasks WHERE id = ?", (task_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        info = dict(row)
+        info['result'] = json.loads(row['result']) if row['result'] is not None else None
+        return info
+
+    def purge(self, max_age):
+        cursor = self._conn().execute(
+            "DELETE FROM tasks WHERE status IN ('done', 'failed') AND updated_at < ?",
+            (time.time() - max_age,)
+        )
+        return cursor.rowcount
+
+    def stats(self):
+        counts = {'queued': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        for row in self._conn().execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status"):
+            counts[row['status']] = row['n']
+        return dict(counts, backend='sqlite', path=self.path)
+
+
+# URL scheme -> factory(location, **options); add networked backends here
+BACKENDS = {
+    'sqlite': SQLiteWorkQueue
+}
+
+
+def open_queue(url=None, **options):
+    """Open a queue from a URL like sqlite:///var/tikscr/queue.db (default WORK_QUEUE_URL)"""
+    url = url or os.environ.get('WORK_QUEUE_URL')
+    if not url:
+        return None
+    scheme, sep, location = url.partition('://')
+    if not sep or scheme not in BACKENDS:
+        raise ValueError(f"Unsupported work queue URL: {url}")
+    if scheme == 'sqlite':
+        # sqlite:///abs/path and sqlite://relative/path
+        location = location or 'work_queue.db'
+    return BACKENDS[scheme](location, **options)